@@ -6,16 +6,25 @@ needed for the natural capital assessment of Papua.
 """
 
 import os
+import csv
+import math
+import asyncio
 import urllib.request
 import zipfile
 import logging
 import shutil
+import json
+import hashlib
+import threading
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
-import geopandas as gpd
-import pandas as pd
-import rasterio
-from rasterio.warp import calculate_default_transform, reproject, Resampling
+
+# geopandas, numpy, rasterio and shapely are imported inside the functions that
+# use them, so that download helpers can be used without the geospatial stack
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -25,10 +34,394 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
-def download_file(url, output_path, description=None):
+def _build_session():
+    """
+    Create a requests session with connection pooling and retries.
+    
+    Returns:
+    --------
+    requests.Session
+        Session with an HTTPAdapter mounted for http:// and https://
+    """
+    retry = Retry(
+        total=5,
+        connect=5,
+        read=5,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['HEAD', 'GET']),
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+    
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+# Shared session so repeated downloads from the same host reuse connections
+_SESSION = _build_session()
+
+# Files that make up a shapefile dataset
+SHAPEFILE_EXTENSIONS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+# Content-addressed store of downloaded files, keyed by SHA-256
+CACHE_DIR = os.environ.get('PAPUA_NC_CACHE', os.path.expanduser('~/.cache/papua-nc'))
+
+# GADM 4.1 shapefile mirrors, in order of preference
+GADM_MIRRORS = (
+    "https://geodata.ucdavis.edu/gadm/gadm4.1/shp",
+    "https://biogeo.ucdavis.edu/data/gadm4.1/shp",
+)
+
+# GBIF occurrence search API; pages are capped at 300 records and the offset
+# at 100,000 records
+GBIF_OCCURRENCE_URL = "https://api.gbif.org/v1/occurrence/search"
+GBIF_PAGE_SIZE = 300
+GBIF_MAX_RECORDS = 100000
+GBIF_FIELDS = ("gbifID", "scientificName", "species", "kingdom", "phylum", "class",
+               "decimalLatitude", "decimalLongitude", "eventDate", "basisOfRecord",
+               "iucnRedListCategory")
+
+def set_session(session):
+    """
+    Replace the session used by the download helpers.
+    
+    Parameters:
+    -----------
+    session : requests.Session
+        Session to use for all subsequent downloads
+    
+    Returns:
+    --------
+    requests.Session
+        The previously used session
+    """
+    global _SESSION
+    previous = _SESSION
+    _SESSION = session
+    return previous
+
+def _probe_url(url):
+    """
+    Issue a HEAD request to find the size of a remote file and whether the
+    server supports byte-range requests.
+    
+    Parameters:
+    -----------
+    url : str
+        URL to probe
+    
+    Returns:
+    --------
+    tuple
+        (total_size, accepts_ranges, headers); (0, False, {}) if the HEAD
+        request fails
+    """
+    try:
+        response = _SESSION.head(url, allow_redirects=True, timeout=(5, 30))
+        response.raise_for_status()
+    except Exception as e:
+        logger.debug(f"HEAD request failed for {url}: {e}")
+        return 0, False, {}
+    
+    total_size = int(response.headers.get('content-length', 0))
+    accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+    return total_size, accepts_ranges, response.headers
+
+def _pick_mirror(urls, timeout=3):
+    """
+    Pick the first mirror to answer a HEAD request for a file.
+    
+    All mirrors are probed concurrently and the first one to return 200 with
+    a Content-Length wins.
+    
+    Parameters:
+    -----------
+    urls : sequence of str
+        The same file on each mirror
+    timeout : float, optional
+        HEAD request timeout in seconds, default is 3
+    
+    Returns:
+    --------
+    str
+        URL on the chosen mirror; the first URL if none of them answers
+    """
+    def probe(url):
+        # Not the module session: its retries would hide a slow mirror
+        response = requests.head(url, allow_redirects=True, timeout=timeout)
+        if response.status_code != 200 or 'Content-Length' not in response.headers:
+            raise requests.HTTPError(f"{url} returned {response.status_code}")
+        return url
+    
+    # Not a with block: its exit would wait for the slowest (dead) mirror
+    executor = ThreadPoolExecutor(max_workers=len(urls))
+    try:
+        futures = [executor.submit(probe, url) for url in urls]
+        for future in as_completed(futures):
+            try:
+                url = future.result()
+            except requests.RequestException as e:
+                logger.debug(f"Mirror probe failed: {e}")
+                continue
+            logger.info(f"Using mirror {url}")
+            return url
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    logger.warning(f"No mirror answered, falling back to {urls[0]}")
+    return urls[0]
+
+def _read_validators(output_path):
+    """
+    Read the cache validators stored next to a downloaded file.
+    
+    Returns:
+    --------
+    dict or None
+        Dictionary with 'etag', 'last_modified', 'size' and 'url', or None if
+        no usable sidecar exists
+    """
+    meta_path = output_path + ".meta.json"
+    if not os.path.exists(meta_path):
+        return None
+    
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable download metadata {meta_path}: {e}")
+        return None
+    
+    if not (meta.get('etag') or meta.get('last_modified')):
+        return None
+    return meta
+
+def _write_validators(output_path, headers, url):
+    """
+    Store the ETag/Last-Modified of a completed download in a sidecar file,
+    together with the URL that served them.
+    """
+    etag = headers.get('etag')
+    last_modified = headers.get('last-modified')
+    if not (etag or last_modified):
+        return
+    
+    meta = {
+        'etag': etag,
+        'last_modified': last_modified,
+        'size': os.path.getsize(output_path),
+        'url': url
+    }
+    with open(output_path + ".meta.json", 'w') as f:
+        json.dump(meta, f, indent=4)
+
+def _is_up_to_date(url, output_path, meta):
+    """
+    Ask the server whether a previously downloaded file is still current
+    using a conditional GET.
+    
+    Returns:
+    --------
+    bool
+        True if the server answered 304 Not Modified (or could not be reached)
+        and the local file matches the recorded size
+    """
+    if meta.get('size') is not None and os.path.getsize(output_path) != meta['size']:
+        logger.warning(f"Local file size does not match recorded size: {output_path}")
+        return False
+    
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    
+    try:
+        with _SESSION.get(url, headers=headers, stream=True, timeout=(5, 30)) as response:
+            if response.status_code == 304:
+                return True
+            response.raise_for_status()
+            return False
+    except Exception as e:
+        logger.warning(f"Could not revalidate {url}, using local copy: {e}")
+        return True
+
+def _block_size(total_size):
+    """
+    Choose the read size for a download of ``total_size`` bytes.
+    
+    Unknown sizes use 1 MiB; known sizes scale with the file (about 512 reads
+    per file), bounded to 64 KiB - 4 MiB.
+    """
+    if not total_size:
+        return 1 << 20
+    return max(64 * 1024, min(4 * 1024 * 1024, total_size // 512))
+
+def _download_range(url, fd, start, end, pbar):
+    """
+    Download bytes ``start``-``end`` (inclusive) of a URL into an open file
+    descriptor at the matching offset.
+    """
+    headers = {'Range': f"bytes={start}-{end}"}
+    response = _SESSION.get(url, headers=headers, stream=True, timeout=(5, 30))
+    response.raise_for_status()
+    if response.status_code != 206:
+        raise IOError(f"Server ignored range request for {url} (status {response.status_code})")
+    
+    offset = start
+    for data in response.iter_content(_block_size(end + 1 - start)):
+        os.pwrite(fd, data, offset)
+        offset += len(data)
+        pbar.update(len(data))
+    
+    if offset != end + 1:
+        raise IOError(f"Incomplete range {start}-{end} for {url}: got {offset - start} bytes")
+
+def _download_ranges(url, part_path, total_size, n_parts, desc):
+    """
+    Download a file as ``n_parts`` concurrent byte ranges written into a
+    pre-allocated output file.
+    """
+    part_size = -(-total_size // n_parts)  # Ceiling division
+    ranges = [(start, min(start + part_size, total_size) - 1)
+              for start in range(0, total_size, part_size)]
+    
+    fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # Reserve the full size up front so each worker can write at its offset
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, total_size)
+        else:
+            os.ftruncate(fd, total_size)
+        
+        with tqdm(
+                desc=desc,
+                total=total_size,
+                unit='B',
+                unit_scale=True,
+                unit_divisor=1024,
+                ) as pbar, ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            
+            futures = [executor.submit(_download_range, url, fd, start, end, pbar)
+                       for start, end in ranges]
+            for future in futures:
+                future.result()
+    finally:
+        os.close(fd)
+
+class _ProgressWriter:
+    """
+    File-like wrapper that advances a progress bar and a running hash on
+    every write.
+    """
+    
+    def __init__(self, f, pbar, hasher):
+        self.f = f
+        self.pbar = pbar
+        self.hasher = hasher
+    
+    def write(self, data):
+        self.pbar.update(len(data))
+        self.hasher.update(data)
+        return self.f.write(data)
+
+def _hash_file(path, hasher=None):
+    """
+    Feed the contents of a file into a SHA-256 hasher.
+    """
+    hasher = hasher if hasher is not None else hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher
+
+def _read_hash(hash_path):
+    """
+    Read the digest from a ``sha256sum``-style sidecar file.
+    """
+    with open(hash_path) as f:
+        content = f.read().split()
+    return content[0].lower() if content else None
+
+def _download_stream(url, part_path, desc):
+    """
+    Download a file as a single stream, resuming from an existing partial file
+    when the server supports it.
+    
+    Returns:
+    --------
+    tuple
+        (response headers, SHA-256 hex digest of the complete file)
+    """
+    existing = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {'Range': f"bytes={existing}-"} if existing else {}
+    
+    response = _SESSION.get(url, headers=headers, stream=True, timeout=(5, 30))
+    
+    if existing and response.status_code == 416:
+        # Range not satisfiable: the partial file is stale, start over
+        logger.warning(f"Cannot resume {part_path}, restarting download")
+        response.close()
+        os.remove(part_path)
+        existing = 0
+        response = _SESSION.get(url, stream=True, timeout=(5, 30))
+    
+    response.raise_for_status()
+    
+    hasher = hashlib.sha256()
+    
+    if existing and response.status_code == 206:
+        logger.info(f"Resuming download at byte {existing}")
+        mode = 'ab'
+        _hash_file(part_path, hasher)
+    else:
+        # Server ignored the range request (or nothing to resume)
+        existing = 0
+        mode = 'wb'
+    
+    # Get file size for progress bar
+    remaining = int(response.headers.get('content-length', 0))
+    total_size = existing + remaining
+    block_size = _block_size(remaining)
+    
+    # Read straight from the urllib3 stream, still undoing any gzip/deflate
+    # transfer encoding
+    response.raw.decode_content = True
+    
+    with open(part_path, mode) as f, tqdm(
+            desc=desc,
+            total=total_size,
+            initial=existing,
+            unit='B',
+            unit_scale=True,
+            unit_divisor=1024,
+            ) as pbar:
+        
+        shutil.copyfileobj(response.raw, _ProgressWriter(f, pbar, hasher), length=block_size)
+    
+    return response.headers, hasher.hexdigest()
+
+def download_file(url, output_path, description=None, n_parts=4,
+                  min_part_size=8 * 1024 * 1024, sha256=None, cache_dir=CACHE_DIR):
     """
     Download a file from a URL with progress bar.
     
+    Large files on servers that advertise ``Accept-Ranges: bytes`` are fetched
+    as several concurrent byte ranges; everything else falls back to a single
+    stream. Data is written to ``output_path + ".part"`` and renamed on
+    completion, so an interrupted single-stream download resumes from where it
+    stopped on the next call.
+    
+    The response ETag/Last-Modified are saved to ``output_path + ".meta.json"``;
+    if the file already exists, a conditional GET is sent and the download is
+    skipped when the server answers 304 Not Modified.
+    
+    Every download is hashed with SHA-256 and checked against ``sha256`` (or
+    an ``output_path + ".sha256"`` sidecar) when one is known. Completed files
+    are hard-linked into a content-addressed cache under ``cache_dir``, so a
+    file with a known hash is linked from the cache instead of downloaded.
+    
     Parameters:
     -----------
     url : str
@@ -37,6 +430,15 @@ def download_file(url, output_path, description=None):
         Path to save the downloaded file
     description : str, optional
         Description for the progress bar
+    n_parts : int, optional
+        Number of concurrent byte ranges for large files, default is 4
+    min_part_size : int, optional
+        Minimum size in bytes of each range, default is 8 MiB
+    sha256 : str, optional
+        Expected SHA-256 hex digest of the file
+    cache_dir : str, optional
+        Content-addressed cache directory, default is ``CACHE_DIR``; None
+        disables the cache
     
     Returns:
     --------
@@ -46,36 +448,139 @@ def download_file(url, output_path, description=None):
     # Create directory if it doesn't exist
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
+    desc = description if description else "Downloading"
+    part_path = output_path + ".part"
+    hash_path = output_path + ".sha256"
+    
     # Check if file already exists
     if os.path.exists(output_path):
-        logger.info(f"File already exists: {output_path}")
-        return output_path
+        meta = _read_validators(output_path)
+        if meta is None:
+            logger.info(f"File already exists: {output_path}")
+            return output_path
+        if _is_up_to_date(url, output_path, meta):
+            logger.info(f"File is up to date: {output_path}")
+            return output_path
+        
+        logger.info(f"Remote file has changed: {url}")
+        # A partial file or hash left over from an older version is stale
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        if os.path.exists(hash_path):
+            os.remove(hash_path)
+    
+    expected = sha256.lower() if sha256 else None
+    if expected is None and os.path.exists(hash_path):
+        expected = _read_hash(hash_path)
+    
+    # Reuse a cached copy of the same content
+    if expected and cache_dir:
+        cache_path = os.path.join(cache_dir, expected)
+        if os.path.exists(cache_path):
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            try:
+                os.link(cache_path, output_path)
+            except OSError:
+                shutil.copyfile(cache_path, output_path)
+            logger.info(f"Using cached copy of {url}: {cache_path}")
+            return output_path
     
     # Download the file
     logger.info(f"Downloading {url} to {output_path}")
     
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
+        total_size, accepts_ranges, headers = _probe_url(url)
+        n_parts = min(n_parts, total_size // min_part_size)
         
-        # Get file size for progress bar
-        total_size = int(response.headers.get('content-length', 0))
-        block_size = 1024  # 1 KB
+        # A leftover partial file is resumed as a single stream
+        if (accepts_ranges and n_parts > 1 and hasattr(os, 'pwrite')
+                and not os.path.exists(part_path)):
+            try:
+                _download_ranges(url, part_path, total_size, n_parts, desc)
+                digest = _hash_file(part_path).hexdigest()
+            except Exception as e:
+                logger.warning(f"Ranged download failed ({e}), retrying as a single stream")
+                # The pre-allocated file says nothing about progress, so drop it
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                headers, digest = _download_stream(url, part_path, desc)
+        else:
+            stream_headers, digest = _download_stream(url, part_path, desc)
+            headers = headers or stream_headers
         
-        desc = description if description else "Downloading"
+        if expected and digest != expected:
+            os.remove(part_path)
+            raise ValueError(f"SHA-256 mismatch for {url}: expected {expected}, got {digest}")
+        
+        os.replace(part_path, output_path)
+        _write_validators(output_path, headers, url)
+        with open(hash_path, 'w') as f:
+            f.write(f"{digest}  {os.path.basename(output_path)}\n")
+        
+        if cache_dir:
+            _add_to_cache(output_path, cache_dir, digest)
+        
+        logger.info(f"Download completed: {output_path}")
+        return output_path
+    
+    except Exception as e:
+        logger.error(f"Error downloading file: {e}")
+        # Keep the partial download so the next call can resume it
+        if os.path.exists(part_path):
+            logger.info(f"Partial download kept at {part_path}")
+        raise
+
+def _add_to_cache(path, cache_dir, digest):
+    """
+    Hard-link a downloaded file into the content-addressed cache.
+    """
+    cache_path = os.path.join(cache_dir, digest)
+    if os.path.exists(cache_path):
+        return
+    
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        os.link(path, cache_path)
+    except OSError as e:
+        # e.g. cache on a different filesystem; a copy would double disk use
+        logger.debug(f"Could not add {path} to download cache: {e}")
+
+async def _download_one(client, url, output_path, description=None):
+    """
+    Stream a single URL to disk using an async HTTP client.
+    
+    Parameters:
+    -----------
+    client : httpx.AsyncClient
+        Client shared by all concurrent downloads
+    url : str
+        URL to download
+    output_path : str
+        Path to save the downloaded file
+    description : str, optional
+        Description used in log messages
+    
+    Returns:
+    --------
+    str
+        Path to the downloaded file
+    """
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
+    if os.path.exists(output_path):
+        logger.info(f"File already exists: {output_path}")
+        return output_path
+    
+    logger.info(f"{description or 'Downloading'}: {url} to {output_path}")
+    
+    try:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            with open(output_path, 'wb') as f:
+                async for chunk in response.aiter_bytes(65536):
+                    f.write(chunk)
         
-        with open(output_path, 'wb') as f, tqdm(
-                desc=desc,
-                total=total_size,
-                unit='B',
-                unit_scale=True,
-                unit_divisor=1024,
-                ) as pbar:
-            
-            for data in response.iter_content(block_size):
-                pbar.update(len(data))
-                f.write(data)
-                
         logger.info(f"Download completed: {output_path}")
         return output_path
     
@@ -86,7 +591,72 @@ def download_file(url, output_path, description=None):
             os.remove(output_path)
         raise
 
-def unzip_file(zip_path, extract_dir=None):
+async def download_files_async(urls, output_paths, descriptions=None, max_connections=32):
+    """
+    Download many files concurrently over a single async HTTP/2 client.
+    
+    Suited to APIs that need many small requests (e.g. paginated GBIF queries),
+    where overlapping network latency matters more than per-file throughput.
+    Requires ``httpx`` with HTTP/2 support (``pip install httpx[http2]``).
+    
+    Parameters:
+    -----------
+    urls : list of str
+        URLs to download
+    output_paths : list of str
+        Paths to save the downloaded files, one per URL
+    descriptions : list of str, optional
+        Descriptions for log messages, one per URL
+    max_connections : int, optional
+        Maximum number of open connections, default is 32
+    
+    Returns:
+    --------
+    list of str
+        Paths to the downloaded files, in the same order as ``urls``
+    """
+    import httpx
+    
+    if len(urls) != len(output_paths):
+        raise ValueError("urls and output_paths must have the same length")
+    if descriptions is None:
+        descriptions = [None] * len(urls)
+    
+    limits = httpx.Limits(max_connections=max_connections,
+                          max_keepalive_connections=max_connections // 2)
+    timeout = httpx.Timeout(30, connect=5)
+    
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=timeout,
+                                 follow_redirects=True) as client:
+        return await asyncio.gather(*[
+            _download_one(client, url, path, desc)
+            for url, path, desc in zip(urls, output_paths, descriptions)
+        ])
+
+def download_files(urls, output_paths, descriptions=None, max_connections=32):
+    """
+    Synchronous wrapper around :func:`download_files_async`.
+    
+    Parameters:
+    -----------
+    urls : list of str
+        URLs to download
+    output_paths : list of str
+        Paths to save the downloaded files, one per URL
+    descriptions : list of str, optional
+        Descriptions for log messages, one per URL
+    max_connections : int, optional
+        Maximum number of open connections, default is 32
+    
+    Returns:
+    --------
+    list of str
+        Paths to the downloaded files, in the same order as ``urls``
+    """
+    return asyncio.run(download_files_async(urls, output_paths, descriptions,
+                                            max_connections=max_connections))
+
+def unzip_file(zip_path, extract_dir=None, members=None):
     """
     Extract a zip file.
     
@@ -96,6 +666,9 @@ def unzip_file(zip_path, extract_dir=None):
         Path to the zip file
     extract_dir : str, optional
         Directory to extract to. If None, extracts to the same directory as the zip file.
+    members : callable, optional
+        Predicate called with each member name; only members for which it
+        returns True are extracted. If None, extracts all members.
     
     Returns:
     --------
@@ -108,8 +681,25 @@ def unzip_file(zip_path, extract_dir=None):
     logger.info(f"Extracting {zip_path} to {extract_dir}")
     
     try:
+        extract_root = os.path.abspath(extract_dir)
+        
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
+            infos = zip_ref.infolist()
+            selected = [info for info in infos
+                        if not info.is_dir() and (members is None or members(info.filename))]
+            
+            # Stream each member through a 64 KiB window so memory use does not
+            # grow with the uncompressed member size
+            for info in selected:
+                dest_path = os.path.abspath(os.path.join(extract_root, info.filename))
+                if os.path.commonpath([extract_root, dest_path]) != extract_root:
+                    raise ValueError(f"Zip member escapes extraction directory: {info.filename}")
+                
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                with zip_ref.open(info) as src, open(dest_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 64 * 1024)
+            
+            logger.info(f"Extracted {len(selected)} of {len(infos)} members")
         
         logger.info(f"Extraction completed to {extract_dir}")
         return extract_dir
@@ -138,16 +728,27 @@ def download_admin_boundaries(output_dir, country_code='IDN', admin_level=1):
     """
     os.makedirs(output_dir, exist_ok=True)
     
-    # GADM data URL
-    gadm_url = f"https://geodata.ucdavis.edu/gadm/gadm4.1/shp/gadm41_{country_code}_shp.zip"
-    zip_path = os.path.join(output_dir, f"gadm41_{country_code}_shp.zip")
+    zip_name = f"gadm41_{country_code}_shp.zip"
+    zip_path = os.path.join(output_dir, zip_name)
+    mirror_urls = [f"{mirror}/{zip_name}" for mirror in GADM_MIRRORS]
+    
+    # An existing zip is revalidated against the mirror that served it, since
+    # its ETag means nothing to the others; only a missing zip needs a probe
+    if os.path.exists(zip_path):
+        meta = _read_validators(zip_path)
+        gadm_url = meta.get('url') if meta else None
+        gadm_url = gadm_url or mirror_urls[0]
+    else:
+        gadm_url = _pick_mirror(mirror_urls)
     
     # Download zip file
     download_file(gadm_url, zip_path, f"Downloading {country_code} admin boundaries")
     
-    # Extract zip file
+    # Extract only the files for the requested admin level
     extract_dir = os.path.join(output_dir, f"gadm41_{country_code}_shp")
-    unzip_file(zip_path, extract_dir)
+    layer_prefix = f"gadm41_{country_code}_{admin_level}."
+    unzip_file(zip_path, extract_dir,
+               members=lambda name: os.path.basename(name).startswith(layer_prefix))
     
     # Path to the shapefile for the requested admin level
     shapefile_path = os.path.join(extract_dir, f"gadm41_{country_code}_{admin_level}.shp")
@@ -276,27 +877,55 @@ def download_mining_data(output_dir):
     
     return mining_path
 
-def download_biodiversity_data(output_dir, region="papua"):
+def _fetch_gbif_page(params, offset, limit):
+    """
+    Fetch one page of GBIF occurrence search results.
+    
+    Parameters:
+    -----------
+    params : dict
+        Search parameters
+    offset : int
+        Offset of the first record
+    limit : int
+        Number of records to request
+    
+    Returns:
+    --------
+    dict
+        Decoded JSON response with "count" and "results"
+    """
+    response = _SESSION.get(GBIF_OCCURRENCE_URL,
+                            params=dict(params, offset=offset, limit=limit), timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+def download_biodiversity_data(output_dir, region="papua", bounds=None, max_workers=16):
     """
     Download biodiversity occurrence data for the specified region.
     
+    Occurrences inside ``bounds`` are paged from the GBIF occurrence search
+    API. The first page gives the record count; the remaining pages are
+    requested concurrently and their rows appended to the CSV as they arrive,
+    so row order follows arrival rather than offset.
+    
     Parameters:
     -----------
     output_dir : str
         Directory to save the downloaded files
     region : str, optional
         Region name, default is "papua"
+    bounds : tuple, optional
+        Bounding box (minx, miny, maxx, maxy) in WGS84 coordinates. Without it
+        a placeholder file is written
+    max_workers : int, optional
+        Number of concurrent page requests, default is 16
     
     Returns:
     --------
     str
         Path to the downloaded biodiversity data
     """
-    # Note: In a real implementation, you would use the GBIF API to download occurrence data
-    
-    logger.warning("This function is a placeholder. Biodiversity data should be downloaded from GBIF API.")
-    
-    # Create a placeholder biodiversity data file
     biodiv_path = os.path.join(output_dir, f"{region}_biodiversity_occurrences.csv")
     
     # Check if file already exists
@@ -304,19 +933,93 @@ def download_biodiversity_data(output_dir, region="papua"):
         logger.info(f"Biodiversity data file already exists: {biodiv_path}")
         return biodiv_path
     
-    logger.info(f"Creating placeholder biodiversity data file: {biodiv_path}")
+    if bounds is None:
+        logger.warning("No bounds given. Biodiversity data should be downloaded from GBIF API.")
+        logger.info(f"Creating placeholder biodiversity data file: {biodiv_path}")
+        with open(biodiv_path, 'w') as f:
+            f.write(f"Placeholder for {region} biodiversity occurrence data")
+        return biodiv_path
+    
+    minx, miny, maxx, maxy = bounds
+    params = {
+        "decimalLatitude": f"{miny},{maxy}",
+        "decimalLongitude": f"{minx},{maxx}",
+        "hasCoordinate": "true",
+        "hasGeospatialIssue": "false",
+    }
+    part_path = biodiv_path + ".part"
     
-    # In a real implementation, you would download the data here
-    # For now, create an empty file as a placeholder
-    with open(biodiv_path, 'w') as f:
-        f.write(f"Placeholder for {region} biodiversity occurrence data")
+    try:
+        first = _fetch_gbif_page(params, 0, GBIF_PAGE_SIZE)
+        count = min(first["count"], GBIF_MAX_RECORDS)
+        offsets = range(GBIF_PAGE_SIZE, count, GBIF_PAGE_SIZE)
+        logger.info(f"Downloading {count} GBIF occurrences in {len(offsets) + 1} pages")
+        
+        with open(part_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=GBIF_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(first["results"])
+            lock = threading.Lock()
+            
+            def fetch_and_write(offset):
+                limit = min(GBIF_PAGE_SIZE, GBIF_MAX_RECORDS - offset)
+                results = _fetch_gbif_page(params, offset, limit)["results"]
+                with lock:
+                    writer.writerows(results)
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                    tqdm(total=len(offsets) + 1, initial=1,
+                         desc=f"Downloading {region} biodiversity data") as pbar:
+                futures = [executor.submit(fetch_and_write, offset) for offset in offsets]
+                for future in as_completed(futures):
+                    future.result()
+                    pbar.update(1)
+        
+        os.replace(part_path, biodiv_path)
+        logger.info(f"Biodiversity data downloaded to {biodiv_path}")
+        return biodiv_path
     
-    return biodiv_path
+    except Exception as e:
+        logger.error(f"Error downloading biodiversity data: {e}")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
 
-def clip_raster_to_region(raster_path, region_boundary, output_path, reproject_to=None):
+@contextmanager
+def _gdal_env():
+    """
+    GDAL configuration shared by the raster operations in this module.
+    
+    Raises the block cache to 1 GB, lets GDAL use all cores for compression
+    and decompression, and tunes the /vsicurl/ reader so remote (COG) GeoTIFFs
+    are fetched in large cached chunks without listing their directory.
+    
+    Yields:
+    -------
+    rasterio.Env
+        The active GDAL environment
+    """
+    import rasterio
+    
+    with rasterio.Env(
+        GDAL_CACHEMAX=1024,
+        GDAL_NUM_THREADS="ALL_CPUS",
+        VSI_CACHE=True,
+        VSI_CACHE_SIZE=256 * 1024 * 1024,
+        CPL_VSIL_CURL_CHUNK_SIZE=4 * 1024 * 1024,
+        GDAL_DISABLE_READDIR_ON_OPEN="EMPTY_DIR",
+    ) as env:
+        yield env
+
+def clip_raster_to_region(raster_path, region_boundary, output_path, reproject_to=None,
+                          resampling='nearest'):
     """
     Clip a raster to a region boundary.
     
+    When ``reproject_to`` is given, the raster is warped on the fly through a
+    ``WarpedVRT`` and clipped in the target CRS, so only one output file is
+    written.
+    
     Parameters:
     -----------
     raster_path : str
@@ -327,26 +1030,41 @@ def clip_raster_to_region(raster_path, region_boundary, output_path, reproject_t
         Path to save the clipped raster
     reproject_to : str, optional
         CRS to reproject to (EPSG code or proj4 string)
+    resampling : str or rasterio.enums.Resampling, optional
+        Resampling method used when reprojecting, default is 'nearest'
     
     Returns:
     --------
     str
         Path to the clipped raster
     """
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.mask import mask
+    from rasterio.vrt import WarpedVRT
+    from shapely.geometry import mapping
+    
     logger.info(f"Clipping raster {raster_path} to region boundary")
     
+    if isinstance(resampling, str):
+        resampling = Resampling[resampling]
+    
     try:
-        # Read the raster
-        with rasterio.open(raster_path) as src:
+        # Read the raster, warping it to the target CRS if requested
+        with ExitStack() as stack:
+            stack.enter_context(_gdal_env())
+            src = stack.enter_context(rasterio.open(raster_path))
+            if reproject_to:
+                src = stack.enter_context(
+                    WarpedVRT(src, crs=reproject_to, resampling=resampling))
+            
             # Reproject the boundary to the raster's CRS if needed
             region_gdf = region_boundary.to_crs(src.crs)
             
-            # Create a mask from the boundary
-            from rasterio.mask import mask
-            from shapely.geometry import mapping
-            
-            # Get geometry in GeoJSON format
-            geoms = [mapping(geom) for geom in region_gdf.geometry]
+            # Dissolve all parts into one geometry so the raster is masked in a
+            # single pass, and get it in GeoJSON format
+            region_union = region_gdf.dissolve().geometry.iloc[0]
+            geoms = [mapping(region_union)]
             
             # Mask the raster (clip it to the boundary)
             out_image, out_transform = mask(src, geoms, crop=True)
@@ -366,10 +1084,6 @@ def clip_raster_to_region(raster_path, region_boundary, output_path, reproject_t
             with rasterio.open(output_path, "w", **out_meta) as dest:
                 dest.write(out_image)
         
-        # Reproject if needed
-        if reproject_to:
-            reproject_raster(output_path, output_path, reproject_to)
-        
         logger.info(f"Raster clipped and saved to {output_path}")
         return output_path
     
@@ -377,10 +1091,16 @@ def clip_raster_to_region(raster_path, region_boundary, output_path, reproject_t
         logger.error(f"Error clipping raster: {e}")
         raise
 
-def reproject_raster(input_path, output_path, dst_crs):
+def reproject_raster(input_path, output_path, dst_crs, tile_size=1024,
+                     resampling='nearest'):
     """
     Reproject a raster to a new coordinate reference system.
     
+    The output is processed in ``tile_size`` x ``tile_size`` windows, reading
+    only the matching part of the source for each one, so memory use depends
+    on the tile size rather than the raster size. Warping uses all CPU cores
+    and the output is written as a tiled, DEFLATE-compressed GeoTIFF.
+    
     Parameters:
     -----------
     input_path : str
@@ -389,17 +1109,31 @@ def reproject_raster(input_path, output_path, dst_crs):
         Path to save the reprojected raster
     dst_crs : str
         Target CRS (EPSG code or proj4 string)
+    tile_size : int, optional
+        Width and height of the processing windows in pixels, default is 1024
+    resampling : str or rasterio.enums.Resampling, optional
+        Resampling method, default is 'nearest' (use 'bilinear' for continuous
+        rasters such as elevation)
     
     Returns:
     --------
     str
         Path to the reprojected raster
     """
+    import numpy as np
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.warp import calculate_default_transform, reproject
+    from rasterio.windows import Window
+    
     logger.info(f"Reprojecting raster {input_path} to {dst_crs}")
     
+    if isinstance(resampling, str):
+        resampling = Resampling[resampling]
+    
     try:
         # Read the source raster
-        with rasterio.open(input_path) as src:
+        with _gdal_env(), rasterio.open(input_path) as src:
             # Calculate the default transform
             transform, width, height = calculate_default_transform(
                 src.crs, dst_crs, src.width, src.height, *src.bounds)
@@ -410,21 +1144,47 @@ def reproject_raster(input_path, output_path, dst_crs):
                 'crs': dst_crs,
                 'transform': transform,
                 'width': width,
-                'height': height
+                'height': height,
+                'tiled': True,
+                'blockxsize': 512,
+                'blockysize': 512,
+                'compress': 'DEFLATE',
+                'predictor': 2,
+                'BIGTIFF': 'IF_SAFER'
             })
             
+            fill_value = src.nodata if src.nodata is not None else 0
+            
             # Create the output file
             with rasterio.open(output_path, 'w', **meta) as dst:
-                # Reproject each band
-                for i in range(1, src.count + 1):
-                    reproject(
-                        source=rasterio.band(src, i),
-                        destination=rasterio.band(dst, i),
-                        src_transform=src.transform,
-                        src_crs=src.crs,
-                        dst_transform=transform,
-                        dst_crs=dst_crs,
-                        resampling=Resampling.nearest)
+                for row_off in range(0, height, tile_size):
+                    for col_off in range(0, width, tile_size):
+                        dst_window = Window(col_off, row_off,
+                                            min(tile_size, width - col_off),
+                                            min(tile_size, height - row_off))
+                        src_window = _source_window(src, dst_crs,
+                                                    dst.window_bounds(dst_window))
+                        
+                        # Reproject each band
+                        for i in range(1, src.count + 1):
+                            dst_data = np.full((int(dst_window.height), int(dst_window.width)),
+                                               fill_value, dtype=meta['dtype'])
+                            
+                            if src_window is not None:
+                                reproject(
+                                    source=src.read(i, window=src_window),
+                                    destination=dst_data,
+                                    src_transform=src.window_transform(src_window),
+                                    src_crs=src.crs,
+                                    src_nodata=src.nodata,
+                                    dst_transform=dst.window_transform(dst_window),
+                                    dst_crs=dst_crs,
+                                    dst_nodata=src.nodata,
+                                    resampling=resampling,
+                                    num_threads=os.cpu_count() or 1,
+                                    warp_mem_limit=512)
+                            
+                            dst.write(dst_data, i, window=dst_window)
         
         logger.info(f"Raster reprojected and saved to {output_path}")
         return output_path
@@ -433,8 +1193,148 @@ def reproject_raster(input_path, output_path, dst_crs):
         logger.error(f"Error reprojecting raster: {e}")
         raise
 
+def _source_window(src, dst_crs, dst_bounds, padding=2):
+    """
+    Find the window of ``src`` that covers a destination tile.
+    
+    Parameters:
+    -----------
+    src : rasterio.DatasetReader
+        Source raster
+    dst_crs : str
+        CRS of the destination bounds
+    dst_bounds : tuple
+        Destination tile bounds (left, bottom, right, top)
+    padding : int, optional
+        Extra source pixels on each side for the resampling kernel
+    
+    Returns:
+    --------
+    rasterio.windows.Window or None
+        Source window, or None if the tile does not overlap the source
+    """
+    from rasterio.warp import transform_bounds
+    from rasterio.windows import Window, from_bounds
+    
+    src_bounds = transform_bounds(dst_crs, src.crs, *dst_bounds, densify_pts=21)
+    window = from_bounds(*src_bounds, transform=src.transform)
+    
+    col_start = max(int(math.floor(window.col_off)) - padding, 0)
+    row_start = max(int(math.floor(window.row_off)) - padding, 0)
+    col_stop = min(int(math.ceil(window.col_off + window.width)) + padding, src.width)
+    row_stop = min(int(math.ceil(window.row_off + window.height)) + padding, src.height)
+    
+    if col_stop <= col_start or row_stop <= row_start:
+        return None
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+def _copy_shapefile(src_path, dst_path):
+    """
+    Copy a shapefile and its sidecar files without parsing the geometry.
+    
+    ``shutil.copyfile`` uses in-kernel copies (``sendfile``/``copy_file_range``)
+    where the platform supports them. Siblings already present at the
+    destination are left alone, so an interrupted copy is completed rather
+    than skipped.
+    
+    Parameters:
+    -----------
+    src_path : str
+        Path to the source .shp file
+    dst_path : str
+        Path to the destination .shp file
+    
+    Returns:
+    --------
+    list
+        Destination paths of the files that were copied
+    """
+    src_base = os.path.splitext(src_path)[0]
+    dst_base = os.path.splitext(dst_path)[0]
+    
+    copied = []
+    for ext in SHAPEFILE_EXTENSIONS:
+        src, dst = src_base + ext, dst_base + ext
+        if os.path.exists(src) and not os.path.exists(dst):
+            shutil.copyfile(src, dst)
+            copied.append(dst)
+    
+    return copied
+
+def fetch_all_data(data_dir, bounds=None, country_code='IDN', admin_level=1,
+                   year=2020, region="papua", max_workers=8):
+    """
+    Download all remote datasets concurrently.
+    
+    The downloads are network-bound and independent of each other, so they are
+    submitted to a thread pool and share the pooled connections of the module
+    session.
+    
+    Parameters:
+    -----------
+    data_dir : str
+        Base data directory; files are saved under its "raw" subdirectory
+    bounds : tuple, optional
+        Bounding box (minx, miny, maxx, maxy) in WGS84 coordinates for the DEM
+        and the biodiversity occurrences
+    country_code : str, optional
+        ISO country code for the admin boundaries, default is 'IDN'
+    admin_level : int, optional
+        Administrative level of the boundaries, default is 1
+    year : int, optional
+        Year of land cover data, default is 2020
+    region : str, optional
+        Region name for the biodiversity data, default is "papua"
+    max_workers : int, optional
+        Maximum number of concurrent downloads, default is 8
+    
+    Returns:
+    --------
+    dict
+        Dictionary mapping dataset names to downloaded file paths
+    """
+    raw_dir = os.path.join(data_dir, "raw")
+    
+    tasks = [
+        ("admin_boundaries", download_admin_boundaries,
+         (os.path.join(raw_dir, "admin_boundaries"), country_code, admin_level)),
+        ("elevation", download_elevation_data,
+         (os.path.join(raw_dir, "elevation"), bounds)),
+        ("landcover", download_landcover_data,
+         (os.path.join(raw_dir, "landcover"), year)),
+        ("mining", download_mining_data,
+         (os.path.join(raw_dir, "mining"),)),
+        ("biodiversity", download_biodiversity_data,
+         (os.path.join(raw_dir, "biodiversity"), region, bounds)),
+    ]
+    
+    for _, _, args in tasks:
+        os.makedirs(args[0], exist_ok=True)
+    
+    results = {}
+    first_error = None
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        futures = {executor.submit(fn, *args): name for name, fn, args in tasks}
+        
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Error downloading {name} data: {e}")
+                if first_error is None:
+                    first_error = e
+    
+    if first_error is not None:
+        raise first_error
+    
+    return results
+
 def download_all_data(data_dir, region="central_papua"):
     """Modified to use local data for Central Papua"""
+    import geopandas as gpd
+    
     # Create directory structure
     raw_dir = os.path.join(data_dir, "raw")
     processed_dir = os.path.join(data_dir, "processed")
@@ -451,12 +1351,23 @@ def download_all_data(data_dir, region="central_papua"):
     lulc_path = os.path.join(raw_dir, "landcover/landcover_central_papua.tif")
     mining_path = os.path.join(raw_dir, "mining/mining_leases.shp")  # Update with your actual filename
     
-    # Copy files to processed directory if needed
-    central_papua_path = os.path.join(processed_dir, "admin_boundaries/central_papua_boundary.shp")
-    if os.path.exists(admin_path) and not os.path.exists(central_papua_path):
-        central_papua_gdf = gpd.read_file(admin_path)
-        central_papua_gdf.to_file(central_papua_path)
-        logger.info(f"Central Papua boundary saved to {central_papua_path}")
+    # Copy files to processed directory if needed. A boundary that already
+    # carries its CRS needs no changes and is copied file by file; otherwise
+    # it is converted to a GeoPackage with the CRS set.
+    if os.path.exists(os.path.splitext(admin_path)[0] + ".prj"):
+        central_papua_path = os.path.join(processed_dir, "admin_boundaries/central_papua_boundary.shp")
+        if os.path.exists(admin_path) and _copy_shapefile(admin_path, central_papua_path):
+            logger.info(f"Central Papua boundary copied to {central_papua_path}")
+    else:
+        central_papua_path = os.path.join(processed_dir, "admin_boundaries/central_papua_boundary.gpkg")
+        if os.path.exists(admin_path) and not os.path.exists(central_papua_path):
+            central_papua_gdf = gpd.read_file(admin_path, engine="pyogrio")
+            # Without a .prj the CRS is unknown; the coordinates are WGS84
+            if central_papua_gdf.crs is None:
+                central_papua_gdf = central_papua_gdf.set_crs("EPSG:4326")
+            central_papua_gdf.to_file(central_papua_path, driver="GPKG", layer="central_papua",
+                                      engine="pyogrio")
+            logger.info(f"Central Papua boundary saved to {central_papua_path}")
     
     # Return paths
     return {
@@ -13,15 +13,31 @@ for use in InVEST models and other analyses.
 
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 import geopandas as gpd
 import rasterio
 from rasterio.warp import calculate_default_transform, reproject, Resampling
-from rasterio.mask import mask
+from rasterio.features import rasterize
+from rasterio.windows import bounds as window_bounds
+from shapely import STRtree
 from shapely.geometry import mapping, box
 import json
 
+# Relative import inside the package; plain import when run as a script
+try:
+    from .download import clip_raster_to_region
+except ImportError:
+    from download import clip_raster_to_region
+
+# numba is optional; without it the scenario overlay falls back to NumPy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 # Set up logging
 logger = logging.getLogger(__name__)
 handler = logging.StreamHandler()
@@ -30,10 +46,257 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+# GDAL configuration for every raster opened by this module: a larger block
+# cache, multi-threaded codecs, and cached, multiplexed HTTP/2 reads of remote
+# GeoTIFFs without directory listings
+_GDAL_OPTS = dict(
+    GDAL_CACHEMAX=512,
+    VSI_CACHE=True,
+    VSI_CACHE_SIZE=128 << 20,
+    GDAL_DISABLE_READDIR_ON_OPEN='EMPTY_DIR',
+    CPL_VSIL_CURL_ALLOWED_EXTENSIONS='.tif,.tiff',
+    GDAL_NUM_THREADS='ALL_CPUS',
+    GDAL_HTTP_MULTIPLEX=True,
+    GDAL_HTTP_VERSION='2',
+)
+
+# Tile size of the GeoTIFFs written by this module; rasters are processed one
+# tile at a time
+BLOCK_SIZE = 512
+
+# Tiled, compressed GeoTIFF creation options
+TILED_PROFILE = {
+    "driver": "GTiff",
+    "tiled": True,
+    "blockxsize": BLOCK_SIZE,
+    "blockysize": BLOCK_SIZE,
+    "compress": "lzw",
+}
+
+# Carbon pool columns of the InVEST carbon pool table (Mg/ha)
+CARBON_POOLS = ('c_above', 'c_below', 'c_soil', 'c_dead')
+
+# Placeholder carbon pools for each land cover class, in the order of
+# CARBON_POOLS; these should be replaced with values from the literature for
+# the study region. Forests that are neither primary nor secondary, and
+# unmatched classes, get zero
+DEFAULT_CARBON_POOLS = {
+    'forest_primary': (200, 40, 100, 20),
+    'forest_secondary': (150, 35, 90, 15),
+    'forest': (0, 0, 0, 0),
+    'shrub': (70, 20, 60, 5),
+    'grass': (15, 5, 40, 1),
+    'crop': (5, 2, 30, 0),
+    'urban': (2, 1, 20, 0),
+    'mine': (0, 0, 5, 0),
+    'other': (0, 0, 0, 0),
+}
+
+# Lowercase class name keywords for each class, in priority order. Each
+# alternative is a lookahead from the start of the name followed by an empty
+# named group, so the first class that matches wins wherever its keywords
+# appear in the name
+_CARBON_CLASS_RULES = (
+    ('forest_primary', r'(?=.*forest)(?=.*primary)'),
+    ('forest_secondary', r'(?=.*forest)(?=.*secondary)'),
+    ('forest', r'(?=.*forest)'),
+    ('shrub', r'(?=.*shrub)'),
+    ('grass', r'(?=.*(?:grass|savanna))'),
+    ('crop', r'(?=.*crop)'),
+    ('urban', r'(?=.*(?:urban|built))'),
+    ('mine', r'(?=.*mine)'),
+)
+CARBON_CLASS_PATTERN = '^(?:' + '|'.join(
+    f'{rule}(?P<{key}>)' for key, rule in _CARBON_CLASS_RULES) + ')'
+
+# Largest code range for which reclassification uses a dense lookup table
+MAX_LUT_SIZE = 65536
+
+def _smallest_code_dtype(src, extra_values=()):
+    """
+    Find the smallest unsigned integer type that holds a LULC raster's codes.
+    
+    Byte rasters are returned as is; wider integer rasters are scanned block
+    by block for their range.
+    
+    Parameters:
+    -----------
+    src : rasterio.DatasetReader
+        LULC raster; only band 1 is considered
+    extra_values : array-like, optional
+        Further values the output must hold, such as new class codes
+    
+    Returns:
+    --------
+    numpy.dtype
+        uint8 or uint16 if the values fit, otherwise the raster's own dtype
+    """
+    dtype = np.dtype(src.dtypes[0])
+    if dtype.kind not in 'ui':
+        return dtype
+    
+    if dtype == np.uint8:
+        lo, hi = 0, 255
+    else:
+        lo, hi = np.inf, -np.inf
+        for _, window in src.block_windows(1):
+            block = src.read(1, window=window)
+            lo, hi = min(lo, block.min()), max(hi, block.max())
+    
+    extra = np.asarray(extra_values)
+    if extra.size > 0:
+        lo, hi = min(lo, extra.min()), max(hi, extra.max())
+    
+    if lo < 0:
+        return dtype
+    for candidate in (np.uint8, np.uint16):
+        if hi <= np.iinfo(candidate).max:
+            return np.dtype(candidate)
+    return dtype
+
+def _reclassify(data, orig_values, new_values):
+    """
+    Map raster values through a reclassification table in a single pass.
+    
+    Values that are not in ``orig_values`` are left unchanged. Integer
+    rasters with small, non-negative code ranges use a dense lookup table and
+    are gathered in place, overwriting ``data``; anything else, including
+    float rasters, falls back to a binary search over the sorted original
+    values.
+    
+    Parameters:
+    -----------
+    data : numpy.ndarray
+        Raster values, integer or float
+    orig_values : array-like
+        Original values
+    new_values : array-like
+        New values, one per original value
+    
+    Returns:
+    --------
+    numpy.ndarray
+        Reclassified values with the dtype of ``data``
+    """
+    orig = np.asarray(orig_values)
+    new = np.asarray(new_values).astype(data.dtype)
+    
+    if data.size == 0 or orig.size == 0:
+        return data
+    
+    # The lookup table is indexed by the raster values, so it only applies
+    # to integer rasters and integer original values
+    use_lut = data.dtype.kind in 'ui' and orig.dtype.kind in 'ui'
+    if use_lut:
+        # Unsigned byte and short rasters are covered by their dtype range
+        # without scanning the data
+        if data.dtype.kind == 'u' and data.dtype.itemsize <= 2:
+            lo, hi = 0, max(np.iinfo(data.dtype).max, int(orig.max()))
+        else:
+            lo = min(int(data.min()), int(orig.min()))
+            hi = max(int(data.max()), int(orig.max()))
+        use_lut = lo >= 0 and hi < MAX_LUT_SIZE
+    
+    if use_lut:
+        # Identity table with the reclassified entries overwritten
+        lut = np.arange(hi + 1).astype(data.dtype)
+        lut[orig] = new
+        # Every index is in range, so 'clip' only skips the buffered copy
+        # that the default mode makes for ``out``
+        return np.take(lut, data, out=data, mode='clip')
+    
+    # Keep the last entry for duplicated original values, as a dict would
+    orig, last = np.unique(orig[::-1], return_index=True)
+    new = new[::-1][last]
+    idx = np.searchsorted(orig, data).clip(max=len(orig) - 1)
+    return np.where(orig[idx] == data, new[idx], data)
+
+if njit is not None:
+    @njit(nogil=True, cache=True)
+    def _apply_scenario_kernel(base, labels, lut, nodata, out):
+        # Single fused pass; releases the GIL so blocks overlap on the
+        # thread pool in _process_blocks
+        for i in range(base.shape[0]):
+            for j in range(base.shape[1]):
+                label = labels[i, j]
+                if label > 0 and base[i, j] != nodata:
+                    out[i, j] = lut[label]
+                else:
+                    out[i, j] = base[i, j]
+
+def _apply_scenario(base, labels, lut, nodata):
+    """
+    Replace the labelled pixels of a block with their scenario values.
+    
+    The block is updated in place.
+    
+    Parameters:
+    -----------
+    base : numpy.ndarray
+        Base LULC block
+    labels : numpy.ndarray
+        Change area labels of the block; 0 keeps the base value
+    lut : numpy.ndarray
+        Scenario value for each label, with the dtype of ``base``
+    nodata : number
+        Base value that is never changed
+    
+    Returns:
+    --------
+    numpy.ndarray
+        Scenario LULC block
+    """
+    if njit is not None:
+        _apply_scenario_kernel(base, labels, lut, base.dtype.type(nodata), base)
+        return base
+    
+    changed = (labels > 0) & (base != nodata)
+    np.copyto(base, lut[labels], where=changed)
+    return base
+
+def _process_blocks(src, dest, func, max_workers=None):
+    """
+    Apply a function to every block of a raster on a thread pool.
+    
+    Each block of ``dest`` is read from band 1 of ``src``, passed through
+    ``func`` and written back. Datasets are not thread-safe, so reads
+    (including decompression) and writes (including compression) are
+    serialized with locks; only ``func`` runs concurrently.
+    
+    Parameters:
+    -----------
+    src : rasterio.DatasetReader
+        Input raster, aligned with ``dest``
+    dest : rasterio.DatasetWriter
+        Output raster
+    func : callable
+        Called as ``func(data, window)``; returns the block to write
+    max_workers : int, optional
+        Number of worker threads, default is the number of CPUs
+    """
+    read_lock = threading.Lock()
+    write_lock = threading.Lock()
+    
+    def process(window):
+        with read_lock:
+            data = src.read(1, window=window)
+        data = func(data, window)
+        with write_lock:
+            dest.write(data, 1, window=window)
+    
+    windows = [window for _, window in dest.block_windows(1)]
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        # Consume the results so that worker exceptions are raised
+        for _ in executor.map(process, windows):
+            pass
+
 def prepare_lulc_for_invest(lulc_path, output_path, reclassify_table=None):
     """
     Prepare land use/land cover data for InVEST models.
     
+    The raster is processed one output tile at a time, so memory use does not
+    depend on the raster size.
+    
     Parameters:
     -----------
     lulc_path : str
@@ -51,41 +314,43 @@ def prepare_lulc_for_invest(lulc_path, output_path, reclassify_table=None):
     logger.info(f"Preparing LULC data for InVEST: {lulc_path}")
     
     try:
+        # Load reclassification table if it's a string (path)
+        if reclassify_table is not None:
+            if isinstance(reclassify_table, str):
+                reclass_df = pd.read_csv(reclassify_table)
+            else:
+                reclass_df = reclassify_table
+            orig_values = reclass_df['original_value'].to_numpy()
+            new_values = reclass_df['new_value'].to_numpy()
+            logger.info("Reclassifying LULC values...")
+        
         # Read the LULC raster
-        with rasterio.open(lulc_path) as src:
-            lulc_data = src.read(1)
+        with rasterio.Env(**_GDAL_OPTS), rasterio.open(lulc_path) as src:
             meta = src.meta.copy()
             
-            # Reclassify if table is provided
-            if reclassify_table is not None:
-                # Load reclassification table if it's a string (path)
-                if isinstance(reclassify_table, str):
-                    reclass_df = pd.read_csv(reclassify_table)
-                else:
-                    reclass_df = reclassify_table
-                
-                # Create a reclassification dictionary
-                reclass_dict = dict(zip(reclass_df['original_value'], reclass_df['new_value']))
-                
-                # Apply reclassification
-                logger.info("Reclassifying LULC values...")
-                reclass_data = np.copy(lulc_data)
-                
-                for orig_val, new_val in reclass_dict.items():
-                    reclass_data[lulc_data == orig_val] = new_val
-                
-                lulc_data = reclass_data
+            # Store the codes in the smallest integer type that holds them;
+            # the differencing predictor shrinks the LZW output further
+            dtype = _smallest_code_dtype(
+                src, new_values if reclassify_table is not None else ())
             
             # Update the metadata if needed
+            meta.update(TILED_PROFILE)
             meta.update({
-                "driver": "GTiff",
-                "compress": "lzw",
-                "nodata": 0
+                "dtype": dtype.name,
+                "nodata": 0,
+                "predictor": 2
             })
             
-            # Write the processed LULC raster
+            # Write the processed LULC raster tile by tile, reclassifying
+            # if a table is provided
+            def process_block(lulc_data, window):
+                lulc_data = lulc_data.astype(dtype, copy=False)
+                if reclassify_table is not None:
+                    lulc_data = _reclassify(lulc_data, orig_values, new_values)
+                return lulc_data
+            
             with rasterio.open(output_path, "w", **meta) as dest:
-                dest.write(lulc_data, 1)
+                _process_blocks(src, dest, process_block)
         
         logger.info(f"Processed LULC raster saved to {output_path}")
         return output_path
@@ -115,18 +380,40 @@ def create_lulc_attribute_table(lulc_path, output_csv, class_names=None):
     logger.info(f"Creating LULC attribute table from {lulc_path}")
     
     try:
-        # Read the LULC raster to get unique values
-        with rasterio.open(lulc_path) as src:
-            lulc_data = src.read(1)
-            unique_values = np.unique(lulc_data)
+        # Read the LULC raster block by block to count the pixels of each value
+        with rasterio.Env(**_GDAL_OPTS), rasterio.open(lulc_path) as src:
+            dtype = np.dtype(src.dtypes[0])
+            if dtype.kind == 'u' and dtype.itemsize <= 2:
+                # Byte and short rasters: accumulate a histogram over the
+                # whole dtype range
+                hist = np.zeros(np.iinfo(dtype).max + 1, dtype=np.int64)
+                for _, window in src.block_windows(1):
+                    block = src.read(1, window=window)
+                    hist += np.bincount(block.ravel(), minlength=hist.size)
+                unique_values = np.flatnonzero(hist)
+                pixel_counts = hist[unique_values]
+            else:
+                block_values, block_counts = [], []
+                for _, window in src.block_windows(1):
+                    values, counts = np.unique(src.read(1, window=window), return_counts=True)
+                    block_values.append(values)
+                    block_counts.append(counts)
+                unique_values, inverse = np.unique(np.concatenate(block_values),
+                                                   return_inverse=True)
+                pixel_counts = np.bincount(inverse, weights=np.concatenate(block_counts))
+                pixel_counts = pixel_counts.astype(np.int64)
+            
             # Remove 0 or NoData values
-            unique_values = unique_values[unique_values > 0]
+            keep = unique_values > 0
+            unique_values = unique_values[keep].astype(dtype)
+            pixel_counts = pixel_counts[keep]
         
         logger.info(f"Found {len(unique_values)} unique LULC classes")
         
         # Create a DataFrame for the attribute table
         attr_df = pd.DataFrame({
-            'value': unique_values
+            'value': unique_values,
+            'pixel_count': pixel_counts
         })
         
         # Add class names if provided
@@ -167,71 +454,36 @@ def create_carbon_pool_table(lulc_classes_csv, output_csv, carbon_values=None):
     logger.info(f"Creating carbon pool table from {lulc_classes_csv}")
     
     try:
-        # Read the LULC classes
-        lulc_df = pd.read_csv(lulc_classes_csv)
+        # Read the LULC classes; names repeat across a few classes, so they
+        # are stored as categories and the codes in the smallest integer type
+        lulc_df = pd.read_csv(lulc_classes_csv, dtype={'class_name': 'category'})
         
         # Create a carbon pool DataFrame
         carbon_df = pd.DataFrame({
-            'lucode': lulc_df['value'],
+            'lucode': pd.to_numeric(lulc_df['value'], downcast='unsigned'),
             'lulc_name': lulc_df['class_name']
         })
         
         # Add carbon pool values
         if carbon_values:
-            # Use provided carbon values
-            for lucode in carbon_df['lucode']:
-                if lucode in carbon_values:
-                    for pool, value in carbon_values[lucode].items():
-                        carbon_df.loc[carbon_df['lucode'] == lucode, pool] = value
+            # Use provided carbon values, joined on lucode; classes without
+            # values get NaN and values for absent classes are ignored
+            lucodes = set(carbon_df['lucode'])
+            cv_df = pd.DataFrame.from_dict(
+                {lucode: pools for lucode, pools in carbon_values.items() if lucode in lucodes},
+                orient='index')
+            cv_df = cv_df.rename_axis('lucode').reset_index()
+            carbon_df = carbon_df.merge(cv_df, on='lucode', how='left')
         else:
-            # Use default values based on land cover type
-            # These are placeholder values and should be replaced with actual values
-            # based on literature for the study region
-            carbon_df['c_above'] = 0  # Above-ground carbon (Mg/ha)
-            carbon_df['c_below'] = 0  # Below-ground carbon (Mg/ha)
-            carbon_df['c_soil'] = 0   # Soil carbon (Mg/ha)
-            carbon_df['c_dead'] = 0   # Dead matter carbon (Mg/ha)
+            # Use default values based on land cover type (very simplified):
+            # classify each name with one regex pass, then look up its pools
+            groups = carbon_df['lulc_name'].str.lower().str.extract(CARBON_CLASS_PATTERN)
+            matched = groups.notna()
+            carbon_class = matched.idxmax(axis=1).where(matched.any(axis=1), 'other')
             
-            # Set values based on class name (very simplified)
-            for idx, row in carbon_df.iterrows():
-                class_name = row['lulc_name'].lower()
-                
-                if 'forest' in class_name:
-                    if 'primary' in class_name:
-                        carbon_df.loc[idx, 'c_above'] = 200
-                        carbon_df.loc[idx, 'c_below'] = 40
-                        carbon_df.loc[idx, 'c_soil'] = 100
-                        carbon_df.loc[idx, 'c_dead'] = 20
-                    elif 'secondary' in class_name:
-                        carbon_df.loc[idx, 'c_above'] = 150
-                        carbon_df.loc[idx, 'c_below'] = 35
-                        carbon_df.loc[idx, 'c_soil'] = 90
-                        carbon_df.loc[idx, 'c_dead'] = 15
-                elif 'shrub' in class_name:
-                    carbon_df.loc[idx, 'c_above'] = 70
-                    carbon_df.loc[idx, 'c_below'] = 20
-                    carbon_df.loc[idx, 'c_soil'] = 60
-                    carbon_df.loc[idx, 'c_dead'] = 5
-                elif 'grass' in class_name or 'savanna' in class_name:
-                    carbon_df.loc[idx, 'c_above'] = 15
-                    carbon_df.loc[idx, 'c_below'] = 5
-                    carbon_df.loc[idx, 'c_soil'] = 40
-                    carbon_df.loc[idx, 'c_dead'] = 1
-                elif 'crop' in class_name:
-                    carbon_df.loc[idx, 'c_above'] = 5
-                    carbon_df.loc[idx, 'c_below'] = 2
-                    carbon_df.loc[idx, 'c_soil'] = 30
-                    carbon_df.loc[idx, 'c_dead'] = 0
-                elif 'urban' in class_name or 'built' in class_name:
-                    carbon_df.loc[idx, 'c_above'] = 2
-                    carbon_df.loc[idx, 'c_below'] = 1
-                    carbon_df.loc[idx, 'c_soil'] = 20
-                    carbon_df.loc[idx, 'c_dead'] = 0
-                elif 'mine' in class_name:
-                    carbon_df.loc[idx, 'c_above'] = 0
-                    carbon_df.loc[idx, 'c_below'] = 0
-                    carbon_df.loc[idx, 'c_soil'] = 5
-                    carbon_df.loc[idx, 'c_dead'] = 0
+            pools = pd.DataFrame(carbon_class.map(DEFAULT_CARBON_POOLS).tolist(),
+                                 index=carbon_df.index, columns=list(CARBON_POOLS))
+            carbon_df[list(CARBON_POOLS)] = pools
         
         # Save the carbon pool table
         os.makedirs(os.path.dirname(output_csv), exist_ok=True)
@@ -248,6 +500,10 @@ def create_scenario_lulc(base_lulc_path, scenario_lulc_path, change_areas, new_v
     """
     Create a scenario LULC raster by modifying specific areas.
     
+    All change areas are burned into a label raster with a single
+    rasterization per output tile, using only the geometries that overlap the
+    tile. Where change areas overlap, the later one wins.
+    
     Parameters:
     -----------
     base_lulc_path : str
@@ -268,15 +524,25 @@ def create_scenario_lulc(base_lulc_path, scenario_lulc_path, change_areas, new_v
     
     try:
         # Read the base LULC raster
-        with rasterio.open(base_lulc_path) as src:
-            lulc_data = src.read(1)
+        with rasterio.Env(**_GDAL_OPTS), rasterio.open(base_lulc_path) as src:
             meta = src.meta.copy()
             
-            # Create a copy for the scenario
-            scenario_data = np.copy(lulc_data)
+            # Pixels without data are left unchanged
+            nodata = src.nodata if src.nodata is not None else 0
             
-            # Update the scenario based on change areas
-            for i, (area, new_value) in enumerate(zip(change_areas, new_values)):
+            # Store the codes in the smallest integer type that holds both the
+            # base and the new values
+            dtype = _smallest_code_dtype(src, list(new_values) + [nodata])
+            meta.update(TILED_PROFILE)
+            meta.update({
+                "dtype": dtype.name,
+                "predictor": 2
+            })
+            
+            # Collect the geometries of all change areas in the raster's CRS,
+            # labelled with the 1-based index of their area
+            geoms, labels = [], []
+            for i, (area, _) in enumerate(zip(change_areas, new_values)):
                 # Convert area to GeoDataFrame if it's not already
                 if not isinstance(area, gpd.GeoDataFrame):
                     area_gdf = gpd.GeoDataFrame(geometry=[area], crs=src.crs)
@@ -284,19 +550,39 @@ def create_scenario_lulc(base_lulc_path, scenario_lulc_path, change_areas, new_v
                     # Ensure the GeoDataFrame has the correct CRS
                     area_gdf = area.to_crs(src.crs)
                 
-                # Create a mask for the area
-                geoms = [mapping(geom) for geom in area_gdf.geometry]
-                area_mask, transform = mask(src, geoms, crop=False, invert=False)
-                area_mask = area_mask[0].astype(bool)
-                
-                # Update the scenario data
-                scenario_data[area_mask] = new_value
+                # Repair any geometry invalidated by simplification, once,
+                # before rasterizing
+                area_geoms = area_gdf.geometry.dropna().make_valid()
+                area_geoms = area_geoms[~area_geoms.is_empty]
+                geoms.extend(area_geoms)
+                labels.extend([i + 1] * len(area_geoms))
+            
+            # Label 0 keeps the base value
+            value_lut = np.array([0] + list(new_values)).astype(meta["dtype"])
+            tree = STRtree(geoms)
+            
+            # Write the scenario LULC raster, updating the tiles that
+            # overlap a change area
+            def process_block(scenario_data, window):
+                scenario_data = scenario_data.astype(dtype, copy=False)
                 
-                logger.info(f"Updated change area {i+1} to value {new_value}")
+                # Burn in input order so later areas overwrite earlier ones
+                hits = np.sort(tree.query(box(*window_bounds(window, src.transform))))
+                if hits.size == 0:
+                    return scenario_data
+                label_data = rasterize(
+                    [(mapping(geoms[j]), labels[j]) for j in hits],
+                    out_shape=scenario_data.shape,
+                    transform=src.window_transform(window),
+                    fill=0,
+                    dtype='int32')
+                return _apply_scenario(scenario_data, label_data, value_lut, nodata)
             
-            # Write the scenario LULC raster
             with rasterio.open(scenario_lulc_path, "w", **meta) as dest:
-                dest.write(scenario_data, 1)
+                _process_blocks(src, dest, process_block)
+            
+            for i, new_value in enumerate(new_values):
+                logger.info(f"Updated change area {i+1} to value {new_value}")
         
         logger.info(f"Scenario LULC raster saved to {scenario_lulc_path}")
         return scenario_lulc_path
@@ -305,10 +591,48 @@ def create_scenario_lulc(base_lulc_path, scenario_lulc_path, change_areas, new_v
         logger.error(f"Error creating scenario LULC: {e}")
         raise
 
+def _copy_as_tiled_geotiff(src_path, dst_path, overview_factors=(2, 4, 8, 16)):
+    """
+    Rewrite a raster as a tiled, compressed GeoTIFF with internal overviews.
+    
+    The data is copied one tile at a time, and the overviews let later reads
+    of a zoomed-out view or a window avoid decoding the full-resolution data.
+    
+    Parameters:
+    -----------
+    src_path : str
+        Path to the input raster
+    dst_path : str
+        Path to save the rewritten raster
+    overview_factors : sequence of int, optional
+        Decimation factors of the overviews, default is (2, 4, 8, 16)
+    
+    Returns:
+    --------
+    str
+        Path to the rewritten raster
+    """
+    with rasterio.Env(**_GDAL_OPTS), rasterio.open(src_path) as src:
+        profile = src.profile.copy()
+        profile.update(TILED_PROFILE)
+        profile["BIGTIFF"] = "IF_SAFER"
+        
+        with rasterio.open(dst_path, "w", **profile) as dst:
+            for _, window in dst.block_windows(1):
+                dst.write(src.read(window=window), window=window)
+            
+            dst.build_overviews(list(overview_factors), Resampling.average)
+            dst.update_tags(ns='rio_overview', resampling='average')
+    
+    return dst_path
+
 def extract_invest_results(invest_workspace, output_dir, model_name):
     """
     Extract and organize results from InVEST model runs.
     
+    Output rasters are rewritten as tiled GeoTIFFs with overviews rather than
+    copied as-is.
+    
     Parameters:
     -----------
     invest_workspace : str
@@ -339,29 +663,51 @@ def extract_invest_results(invest_workspace, output_dir, model_name):
             output_carbon_path = os.path.join(output_dir, 'total_carbon.tif')
             
             if os.path.exists(total_carbon_path):
-                import shutil
-                shutil.copy2(total_carbon_path, output_carbon_path)
+                _copy_as_tiled_geotiff(total_carbon_path, output_carbon_path)
                 results['total_carbon'] = output_carbon_path
             
             # Check for valuation results
             npv_path = os.path.join(invest_workspace, 'net_present_value.tif')
             if os.path.exists(npv_path):
                 output_npv_path = os.path.join(output_dir, 'net_present_value.tif')
-                shutil.copy2(npv_path, output_npv_path)
+                _copy_as_tiled_geotiff(npv_path, output_npv_path)
                 results['npv'] = output_npv_path
             
             # Calculate summary statistics
             if 'total_carbon' in results:
-                with rasterio.open(results['total_carbon']) as src:
-                    carbon_data = src.read(1)
-                    valid_data = carbon_data[carbon_data > 0]
+                with rasterio.Env(**_GDAL_OPTS), rasterio.open(results['total_carbon']) as src:
+                    # Accumulate the statistics in a single pass over the
+                    # blocks, merging each block's mean and sum of squared
+                    # deviations (Chan et al.) so the variance stays stable;
+                    # the total is a plain running sum
+                    count, mean_carbon, m2, total_carbon = 0, 0.0, 0.0, 0.0
+                    min_carbon, max_carbon = np.inf, -np.inf
+                    for _, window in src.block_windows(1):
+                        carbon_data = src.read(1, window=window)
+                        valid_data = carbon_data[carbon_data > 0].astype(np.float64)
+                        n = valid_data.size
+                        if n == 0:
+                            continue
+                        block_sum = valid_data.sum()
+                        block_mean = block_sum / n
+                        deviations = valid_data - block_mean
+                        delta = block_mean - mean_carbon
+                        m2 += np.dot(deviations, deviations) + delta ** 2 * count * n / (count + n)
+                        count += n
+                        mean_carbon += delta * n / count
+                        total_carbon += block_sum
+                        min_carbon = min(min_carbon, valid_data.min())
+                        max_carbon = max(max_carbon, valid_data.max())
+                    
+                    if count == 0:
+                        raise ValueError(f"No positive carbon values in {results['total_carbon']}")
                     
                     summary = {
-                        'mean_carbon': float(np.mean(valid_data)),
-                        'total_carbon': float(np.sum(valid_data)),
-                        'min_carbon': float(np.min(valid_data)),
-                        'max_carbon': float(np.max(valid_data)),
-                        'std_carbon': float(np.std(valid_data))
+                        'mean_carbon': float(mean_carbon),
+                        'total_carbon': float(total_carbon),
+                        'min_carbon': float(min_carbon),
+                        'max_carbon': float(max_carbon),
+                        'std_carbon': float(np.sqrt(m2 / count))
                     }
                     
                     # Save summary as JSON
@@ -379,15 +725,14 @@ def extract_invest_results(invest_workspace, output_dir, model_name):
             output_quality_path = os.path.join(output_dir, 'habitat_quality.tif')
             
             if os.path.exists(quality_path):
-                import shutil
-                shutil.copy2(quality_path, output_quality_path)
+                _copy_as_tiled_geotiff(quality_path, output_quality_path)
                 results['habitat_quality'] = output_quality_path
             
             # Check for degradation results
             deg_path = os.path.join(invest_workspace, 'degradation.tif')
             if os.path.exists(deg_path):
                 output_deg_path = os.path.join(output_dir, 'habitat_degradation.tif')
-                shutil.copy2(deg_path, output_deg_path)
+                _copy_as_tiled_geotiff(deg_path, output_deg_path)
                 results['degradation'] = output_deg_path
         
         elif model_name == 'sdr':
@@ -398,15 +743,14 @@ def extract_invest_results(invest_workspace, output_dir, model_name):
             output_sed_path = os.path.join(output_dir, 'sediment_export.tif')
             
             if os.path.exists(sed_export_path):
-                import shutil
-                shutil.copy2(sed_export_path, output_sed_path)
+                _copy_as_tiled_geotiff(sed_export_path, output_sed_path)
                 results['sediment_export'] = output_sed_path
             
             # Check for retention results
             ret_path = os.path.join(invest_workspace, 'sed_retention.tif')
             if os.path.exists(ret_path):
                 output_ret_path = os.path.join(output_dir, 'sediment_retention.tif')
-                shutil.copy2(ret_path, output_ret_path)
+                _copy_as_tiled_geotiff(ret_path, output_ret_path)
                 results['sediment_retention'] = output_ret_path
         
         logger.info(f"Extracted {len(results)} results for {model_name} model")
@@ -416,6 +760,27 @@ def extract_invest_results(invest_workspace, output_dir, model_name):
         logger.error(f"Error extracting InVEST results: {e}")
         raise
 
+def _first_with_ext(directory, ext):
+    """
+    Find the first file in a directory with the given extension.
+    
+    The directory is scanned lazily and the scan stops at the first match.
+    
+    Parameters:
+    -----------
+    directory : str
+        Directory to scan
+    ext : str
+        File extension, including the dot
+    
+    Returns:
+    --------
+    str or None
+        File name of the first match, or None if there is none
+    """
+    with os.scandir(directory) as entries:
+        return next((entry.name for entry in entries if entry.name.endswith(ext)), None)
+
 def prepare_all_data(raw_data_dir, processed_data_dir, invest_input_dir):
     """
     Prepare all data for the natural capital assessment.
@@ -444,20 +809,21 @@ def prepare_all_data(raw_data_dir, processed_data_dir, invest_input_dir):
     admin_dir = os.path.join(raw_data_dir, "admin_boundaries")
     papua_path = os.path.join(processed_data_dir, "admin_boundaries/papua_boundary.shp")
     
+    # Read the boundary once; it is used to clip both LULC and mining data
+    papua_gdf = gpd.read_file(papua_path) if os.path.exists(papua_path) else None
+    
     # 2. Process land cover data
     lulc_dir = os.path.join(raw_data_dir, "landcover")
-    lulc_files = [f for f in os.listdir(lulc_dir) if f.endswith('.tif')]
+    lulc_file = _first_with_ext(lulc_dir, '.tif')
     
-    if lulc_files:
-        lulc_path = os.path.join(lulc_dir, lulc_files[0])
+    if lulc_file:
+        lulc_path = os.path.join(lulc_dir, lulc_file)
         
         # Clip LULC to Papua
-        if os.path.exists(papua_path):
-            papua_gdf = gpd.read_file(papua_path)
+        if papua_gdf is not None:
             papua_lulc_path = os.path.join(processed_data_dir, "lulc/papua_lulc.tif")
             os.makedirs(os.path.dirname(papua_lulc_path), exist_ok=True)
             
-            from download import clip_raster_to_region
             clip_raster_to_region(lulc_path, papua_gdf, papua_lulc_path)
             
             lulc_path = papua_lulc_path
@@ -477,25 +843,27 @@ def prepare_all_data(raw_data_dir, processed_data_dir, invest_input_dir):
     
     # 3. Process mining data
     mining_dir = os.path.join(raw_data_dir, "mining")
-    mining_files = [f for f in os.listdir(mining_dir) if f.endswith('.shp')]
+    mining_file = _first_with_ext(mining_dir, '.shp')
     
-    if mining_files:
-        mining_path = os.path.join(mining_dir, mining_files[0])
+    if mining_file:
+        mining_path = os.path.join(mining_dir, mining_file)
+        mining_gdf = gpd.read_file(mining_path)
         
         # Clip mining data to Papua
-        if os.path.exists(papua_path):
-            papua_gdf = gpd.read_file(papua_path)
+        if papua_gdf is not None:
             papua_mining_path = os.path.join(processed_data_dir, "mining/papua_mining.shp")
             os.makedirs(os.path.dirname(papua_mining_path), exist_ok=True)
             
-            mining_gdf = gpd.read_file(mining_path)
-            mining_in_wp = gpd.overlay(mining_gdf, papua_gdf, how='intersection')
-            mining_in_wp.to_file(papua_mining_path)
+            # Clipping prunes candidates with the spatial index before
+            # intersecting, and only the mining attributes are kept
+            mining_gdf = gpd.clip(mining_gdf, papua_gdf, keep_geom_type=True)
+            mining_gdf.to_file(papua_mining_path)
             
             mining_path = papua_mining_path
     else:
         logger.warning("No mining files found in the mining directory")
         mining_path = None
+        mining_gdf = None
     
     # 4. Create scenario LULC (restoration scenario)
     if lulc_path and mining_path:
@@ -504,16 +872,27 @@ def prepare_all_data(raw_data_dir, processed_data_dir, invest_input_dir):
         
         restoration_lulc_path = os.path.join(scenario_dir, "restoration_scenario.tif")
         
-        # Use mining areas as change areas
-        mining_gdf = gpd.read_file(mining_path)
+        # Use mining areas as change areas, reusing the clipped data in memory
+        
+        # Buffer mining areas by 1km for restoration zone, in metres if the
+        # data is in geographic coordinates. Four segments per quarter circle
+        # are plenty at raster resolution, and vertices closer than half a
+        # pixel are dropped before rasterizing
+        with rasterio.Env(**_GDAL_OPTS), rasterio.open(lulc_path) as src:
+            lulc_crs, pixel_size = src.crs, src.res[0]
         
-        # Buffer mining areas by 1km for restoration zone
         mining_buffer = mining_gdf.copy()
-        mining_buffer.geometry = mining_gdf.buffer(1000)
+        if mining_buffer.crs is not None and mining_buffer.crs.is_geographic:
+            mining_buffer = mining_buffer.to_crs(mining_buffer.estimate_utm_crs())
+        mining_buffer.geometry = mining_buffer.geometry.buffer(1000, resolution=4)
+        if mining_buffer.crs is not None:
+            mining_buffer = mining_buffer.to_crs(lulc_crs)
+        mining_buffer.geometry = mining_buffer.geometry.simplify(pixel_size / 2,
+                                                                 preserve_topology=False)
         
         # Get forest class value (simplified approach)
         if os.path.exists(lulc_classes_path):
-            lulc_classes = pd.read_csv(lulc_classes_path)
+            lulc_classes = pd.read_csv(lulc_classes_path, dtype={'class_name': 'category'})
             forest_classes = lulc_classes[lulc_classes['class_name'].str.contains('forest', case=False)]
             
             if len(forest_classes) > 0:
@@ -6,15 +6,30 @@ as well as utility functions for preparing inputs and processing outputs.
 """
 
 import os
+import json
+import hashlib
 import logging
+from contextlib import nullcontext
 import numpy as np
 import pandas as pd
 import geopandas as gpd
 import rasterio
-from rasterio.mask import mask
+from rasterio.features import geometry_mask, geometry_window
 from shapely.geometry import mapping
 import natcap.invest.carbon
 
+# numba is optional; without it the summary statistics fall back to NumPy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# xxhash is optional; it hashes large LULC rasters much faster than SHA-256
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 # Set up logging
 logger = logging.getLogger(__name__)
 handler = logging.StreamHandler()
@@ -23,6 +38,148 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+# Number of histogram bins used to locate the median when streaming
+MEDIAN_BINS = 65536
+
+# Dtype carbon rasters are read as; statistics accumulate in float64
+CARBON_DTYPE = np.float32
+
+# File in the model workspace recording the hash of the inputs of the last run
+INPUTS_HASH_FILE = '.invest_hash'
+
+def _streaming_median(valid_blocks, count, min_value, max_value):
+    """
+    Find the exact median of values that are read block by block.
+    
+    A first pass builds a histogram over [min_value, max_value]; a second pass
+    only keeps the values in the bins that hold the middle rank(s), so memory
+    use is bounded by the number of distinct values in those bins.
+    
+    Parameters:
+    -----------
+    valid_blocks : callable
+        Returns an iterable of 1-D arrays of values; called twice
+    count : int
+        Total number of values
+    min_value, max_value : float
+        Range of the values
+    
+    Returns:
+    --------
+    float
+        Median, averaging the two middle values for an even count
+    """
+    if min_value == max_value:
+        return float(min_value)
+    
+    hist = np.zeros(MEDIAN_BINS, dtype=np.int64)
+    for values in valid_blocks():
+        hist += np.histogram(values, bins=MEDIAN_BINS, range=(min_value, max_value))[0]
+    edges = np.histogram_bin_edges([], bins=MEDIAN_BINS, range=(min_value, max_value))
+    cumulative = np.cumsum(hist)
+    
+    # Bins holding the middle rank(s), and the rank within each bin
+    ranks = sorted({(count - 1) // 2, count // 2})
+    bins = np.searchsorted(cumulative, ranks, side='right')
+    
+    bin_values = {b: {} for b in set(bins.tolist())}
+    for values in valid_blocks():
+        for b, counts in bin_values.items():
+            upper = values <= edges[b + 1] if b == MEDIAN_BINS - 1 else values < edges[b + 1]
+            selected = values[(values >= edges[b]) & upper]
+            for value, n in zip(*np.unique(selected, return_counts=True)):
+                counts[value] = counts.get(value, 0) + int(n)
+    
+    middle = []
+    for rank, b in zip(ranks, bins.tolist()):
+        rank_in_bin = rank - (cumulative[b - 1] if b > 0 else 0)
+        sorted_values = sorted(bin_values[b])
+        position = np.searchsorted(np.cumsum([bin_values[b][v] for v in sorted_values]),
+                                   rank_in_bin, side='right')
+        middle.append(float(sorted_values[position]))
+    
+    return float(np.mean([middle[0], middle[-1]]))
+
+if njit is not None:
+    @njit(nogil=True, cache=True)
+    def _positive_stats_kernel(values):
+        # Single pass over the block without building the valid subset
+        count = 0
+        total = 0.0
+        min_value = np.inf
+        max_value = -np.inf
+        for value in values:
+            if value > 0:
+                count += 1
+                total += value
+                min_value = min(min_value, value)
+                max_value = max(max_value, value)
+        return count, total, min_value, max_value
+
+def _positive_stats(block):
+    """
+    Count, sum, min and max of the positive (valid) values of a block.
+    
+    Parameters:
+    -----------
+    block : numpy.ndarray
+        Block of carbon values
+    
+    Returns:
+    --------
+    tuple
+        (count, total, min, max); min and max are inf and -inf when the
+        block has no valid values
+    """
+    if njit is not None:
+        return _positive_stats_kernel(block.ravel())
+    
+    values = block[block > 0]
+    if values.size == 0:
+        return 0, 0.0, np.inf, -np.inf
+    return values.size, float(values.sum(dtype=np.float64)), values.min(), values.max()
+
+def _streaming_summary(blocks):
+    """
+    Compute carbon summary statistics from a raster read block by block.
+    
+    Values that are not positive are treated as NoData.
+    
+    Parameters:
+    -----------
+    blocks : callable
+        Returns an iterable of carbon value blocks; called up to three times
+    
+    Returns:
+    --------
+    dict
+        mean, median, min, max and total carbon, and the pixel count
+    """
+    count, total = 0, 0.0
+    min_value, max_value = np.inf, -np.inf
+    for block in blocks():
+        block_count, block_total, block_min, block_max = _positive_stats(block)
+        count += block_count
+        total += block_total
+        min_value = min(min_value, block_min)
+        max_value = max(max_value, block_max)
+    
+    if count == 0:
+        raise ValueError("No valid carbon values")
+    
+    def valid_blocks():
+        for block in blocks():
+            yield block[block > 0]
+    
+    return {
+        'mean_carbon': float(total / count),
+        'median_carbon': _streaming_median(valid_blocks, count, min_value, max_value),
+        'min_carbon': float(min_value),
+        'max_carbon': float(max_value),
+        'total_carbon': float(total),
+        'pixel_count': int(count)
+    }
+
 def prepare_carbon_inputs(lulc_path, carbon_pools_csv, output_dir):
     """
     Prepare and validate inputs for the InVEST Carbon model.
@@ -59,9 +216,12 @@ def prepare_carbon_inputs(lulc_path, carbon_pools_csv, output_dir):
             lulc_meta = src.meta
             lulc_crs = src.crs
             lulc_bounds = src.bounds
-            lulc_data = src.read(1)
-            unique_values = np.unique(lulc_data)
-            logger.info(f"LULC raster loaded: shape={lulc_data.shape}, unique values={len(unique_values)}")
+            # Collect the unique values block by block
+            unique_set = set()
+            for _, window in src.block_windows(1):
+                unique_set.update(np.unique(src.read(1, window=window)).tolist())
+            unique_values = np.array(sorted(unique_set), dtype=src.dtypes[0])
+            logger.info(f"LULC raster loaded: shape={src.shape}, unique values={len(unique_values)}")
     except Exception as e:
         logger.error(f"Error reading LULC raster: {e}")
         raise
@@ -75,7 +235,8 @@ def prepare_carbon_inputs(lulc_path, carbon_pools_csv, output_dir):
             raise ValueError(f"Carbon pools CSV missing required columns: {missing_cols}")
         
         # Check if all LULC values have carbon data
-        missing_values = [val for val in unique_values if val not in carbon_df['lucode'].values and val != 0]
+        missing_values = np.setdiff1d(unique_values[unique_values != 0],
+                                      carbon_df['lucode'].to_numpy()).tolist()
         if missing_values:
             logger.warning(f"Carbon data missing for LULC classes: {missing_values}")
         
@@ -93,30 +254,79 @@ def prepare_carbon_inputs(lulc_path, carbon_pools_csv, output_dir):
     
     return args
 
-def run_carbon_model(args):
+def _inputs_hash(args):
+    """
+    Hash the model arguments together with the contents of their input files.
+    
+    Parameters:
+    -----------
+    args : dict
+        Dictionary of model arguments
+    
+    Returns:
+    --------
+    str
+        Hex digest of the arguments and input files
+    """
+    hasher = xxhash.xxh3_64() if xxhash is not None else hashlib.sha256()
+    hasher.update(json.dumps(args, sort_keys=True, default=str).encode())
+    
+    for key, value in sorted(args.items()):
+        if key != 'workspace_dir' and isinstance(value, str) and os.path.isfile(value):
+            with open(value, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    hasher.update(chunk)
+    
+    return hasher.hexdigest()
+
+def run_carbon_model(args, force=False):
     """
     Run the InVEST Carbon Storage and Sequestration model.
     
+    The run is skipped, and the existing workspace summarized, when the
+    workspace holds the outputs of a previous run with the same arguments
+    and input file contents.
+    
     Parameters:
     -----------
     args : dict
         Dictionary of model arguments
+    force : bool, optional
+        Run the model even if the inputs are unchanged
     
     Returns:
     --------
     dict
         Dictionary of model outputs and summary statistics
     """
+    hash_path = os.path.join(args['workspace_dir'], INPUTS_HASH_FILE)
+    total_carbon_path = os.path.join(args['workspace_dir'], 'total_carbon.tif')
+    inputs_hash = _inputs_hash(args)
+    
+    if not force and os.path.exists(hash_path) and os.path.exists(total_carbon_path):
+        with open(hash_path) as f:
+            if f.read().strip() == inputs_hash:
+                logger.info("Carbon model inputs unchanged, reusing previous results")
+                return {
+                    'model_results': None,
+                    'summary': summarize_carbon_results(args['workspace_dir'])
+                }
+    
     logger.info("Running InVEST Carbon Storage and Sequestration model...")
     
-    # Run the model
+    # Run the model, dropping the old hash first so a failed run is not reused
     try:
+        if os.path.exists(hash_path):
+            os.remove(hash_path)
         carbon_results = natcap.invest.carbon.execute(args)
         logger.info("Carbon model execution completed successfully")
     except Exception as e:
         logger.error(f"Error executing carbon model: {e}")
         raise
     
+    with open(hash_path, 'w') as f:
+        f.write(inputs_hash)
+    
     # Process and summarize results
     results_summary = summarize_carbon_results(args['workspace_dir'])
     
@@ -146,21 +356,15 @@ def summarize_carbon_results(workspace_dir):
     if not os.path.exists(total_carbon_path):
         raise FileNotFoundError(f"Total carbon output not found: {total_carbon_path}")
     
-    # Read the total carbon raster
+    # Read the total carbon raster block by block
     with rasterio.open(total_carbon_path) as src:
-        carbon_data = src.read(1)
-        valid_data = carbon_data[carbon_data > 0]  # Remove NoData values
+        def blocks():
+            for _, window in src.block_windows(1):
+                yield src.read(1, window=window, out_dtype=CARBON_DTYPE)
         
-        # Calculate summary statistics
-        summary = {
-            'mean_carbon': float(np.mean(valid_data)),
-            'median_carbon': float(np.median(valid_data)),
-            'min_carbon': float(np.min(valid_data)),
-            'max_carbon': float(np.max(valid_data)),
-            'total_carbon': float(np.sum(valid_data)),
-            'pixel_count': int(len(valid_data)),
-            'pixel_size': src.res[0] * src.res[1]
-        }
+        # Calculate summary statistics, excluding NoData values
+        summary = _streaming_summary(blocks)
+        summary['pixel_size'] = src.res[0] * src.res[1]
         
         # Convert pixel count to area (assuming square pixels)
         # Area in hectares (assuming resolution is in meters)
@@ -178,12 +382,16 @@ def extract_carbon_for_region(carbon_raster_path, region_gdf):
     """
     Extract carbon values for a specific region.
     
+    Only the window covering the region is read from the raster. To extract
+    many regions, pass an open dataset so the raster is opened only once.
+    
     Parameters:
     -----------
-    carbon_raster_path : str
-        Path to the carbon raster file
+    carbon_raster_path : str or rasterio.DatasetReader
+        Path to the carbon raster file, or the open raster
     region_gdf : GeoDataFrame
-        GeoDataFrame containing the region geometry
+        GeoDataFrame containing the region geometry; reprojected to the
+        raster CRS if needed
     
     Returns:
     --------
@@ -195,22 +403,31 @@ def extract_carbon_for_region(carbon_raster_path, region_gdf):
     logger.info(f"Extracting carbon values for region: {region_gdf.iloc[0].name if 'name' in region_gdf.columns else 'unnamed'}")
     
     try:
-        with rasterio.open(carbon_raster_path) as src:
-            # Mask the raster with the region geometry
+        opened = (nullcontext(carbon_raster_path) if isinstance(carbon_raster_path, rasterio.io.DatasetReader)
+                  else rasterio.open(carbon_raster_path))
+        with opened as src:
+            if region_gdf.crs is not None and src.crs is not None and region_gdf.crs != src.crs:
+                region_gdf = region_gdf.to_crs(src.crs)
+            
+            # Read the window covering the region geometry
             shapes = [mapping(geom) for geom in region_gdf.geometry]
-            masked_data, masked_transform = mask(src, shapes, crop=True)
-            masked_data = masked_data[0]  # Get the first band
+            window = geometry_window(src, shapes)
+            masked_data = src.read(1, window=window, masked=True, out_dtype=CARBON_DTYPE)
             
-            # Remove NoData values
-            valid_data = masked_data[masked_data > 0]
+            # Keep the pixels inside the region, removing NoData values
+            inside = geometry_mask(shapes, out_shape=masked_data.shape,
+                                   transform=src.window_transform(window), invert=True)
+            inside &= ~np.ma.getmaskarray(masked_data)
+            carbon_data = masked_data.data
+            valid_data = carbon_data[inside & (carbon_data > 0)]
             
             # Calculate summary statistics
             summary = {
-                'mean_carbon': float(np.mean(valid_data)),
+                'mean_carbon': float(np.mean(valid_data, dtype=np.float64)),
                 'median_carbon': float(np.median(valid_data)),
                 'min_carbon': float(np.min(valid_data)),
                 'max_carbon': float(np.max(valid_data)),
-                'total_carbon': float(np.sum(valid_data)),
+                'total_carbon': float(np.sum(valid_data, dtype=np.float64)),
                 'pixel_count': int(len(valid_data)),
                 'pixel_size': src.res[0] * src.res[1]
             }
@@ -234,8 +451,10 @@ def calculate_carbon_value(carbon_data, area_ha, price_per_ton_co2=40, discount_
     
     Parameters:
     -----------
-    carbon_data : numpy.ndarray or float
-        Carbon values in Mg C/ha or total Mg C
+    carbon_data : numpy.ndarray, dict or float
+        Carbon values in Mg C/ha or total Mg C, or a summary dict from
+        summarize_carbon_results or extract_carbon_for_region, whose mean
+        is reused instead of recomputed
     area_ha : float
         Area in hectares
     price_per_ton_co2 : float, optional
@@ -250,10 +469,13 @@ def calculate_carbon_value(carbon_data, area_ha, price_per_ton_co2=40, discount_
     """
     logger.info(f"Calculating carbon value with price={price_per_ton_co2} USD/tCO2 and discount_rate={discount_rate}")
     
-    # Handle both array and single value inputs
-    if isinstance(carbon_data, np.ndarray):
-        mean_carbon = np.mean(carbon_data)
-        total_carbon = np.sum(carbon_data) * area_ha / len(carbon_data) if len(carbon_data) > 0 else 0
+    # Handle summary, array and single value inputs
+    if isinstance(carbon_data, dict):
+        mean_carbon = carbon_data['mean_carbon']
+        total_carbon = mean_carbon * area_ha
+    elif isinstance(carbon_data, np.ndarray):
+        mean_carbon = np.mean(carbon_data, dtype=np.float64)
+        total_carbon = np.sum(carbon_data, dtype=np.float64) * area_ha / len(carbon_data) if len(carbon_data) > 0 else 0
     else:
         mean_carbon = carbon_data
         total_carbon = carbon_data * area_ha
@@ -295,10 +517,12 @@ def compare_scenarios(baseline_carbon, scenario_carbon, area_ha, price_per_ton_c
     
     Parameters:
     -----------
-    baseline_carbon : numpy.ndarray or float
-        Baseline carbon values in Mg C/ha
-    scenario_carbon : numpy.ndarray or float
-        Scenario carbon values in Mg C/ha
+    baseline_carbon : numpy.ndarray, dict or float
+        Baseline carbon values in Mg C/ha, or a summary dict from
+        summarize_carbon_results or extract_carbon_for_region
+    scenario_carbon : numpy.ndarray, dict or float
+        Scenario carbon values in Mg C/ha, or a summary dict from
+        summarize_carbon_results or extract_carbon_for_region
     area_ha : float
         Area in hectares
     price_per_ton_co2 : float, optional
@@ -311,14 +535,18 @@ def compare_scenarios(baseline_carbon, scenario_carbon, area_ha, price_per_ton_c
     """
     logger.info("Comparing carbon scenarios...")
     
-    # Handle both array and single value inputs
-    if isinstance(baseline_carbon, np.ndarray):
-        baseline_mean = np.mean(baseline_carbon)
+    # Handle summary, array and single value inputs
+    if isinstance(baseline_carbon, dict):
+        baseline_mean = baseline_carbon['mean_carbon']
+    elif isinstance(baseline_carbon, np.ndarray):
+        baseline_mean = np.mean(baseline_carbon, dtype=np.float64)
     else:
         baseline_mean = baseline_carbon
         
-    if isinstance(scenario_carbon, np.ndarray):
-        scenario_mean = np.mean(scenario_carbon)
+    if isinstance(scenario_carbon, dict):
+        scenario_mean = scenario_carbon['mean_carbon']
+    elif isinstance(scenario_carbon, np.ndarray):
+        scenario_mean = np.mean(scenario_carbon, dtype=np.float64)
     else:
         scenario_mean = scenario_carbon
     
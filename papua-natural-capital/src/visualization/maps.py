@@ -12,13 +12,17 @@ of spatial data related to ecosystem services and natural capital.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import geopandas as gpd
 import pandas as pd
 import rasterio
-from rasterio.plot import show
+from rasterio.plot import plotting_extent
+from rasterio.enums import Resampling
+from rasterio.warp import transform_bounds
 from rasterio.mask import mask
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.patches import Patch
@@ -26,6 +30,9 @@ import matplotlib.ticker as mticker
 from matplotlib.gridspec import GridSpec
 import contextily as ctx
 
+# Keep fetched basemap tiles on disk so repeated maps do not download them again
+BASEMAP_CACHE_DIR = os.environ.get('PAPUA_BASEMAP_CACHE', os.path.expanduser('~/.cache/papua_basemap'))
+
 # Set default styling
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 8)
@@ -41,6 +48,233 @@ IMPACT_CMAP = LinearSegmentedColormap.from_list(
     'impact_cmap', ['#FF3333', '#FFCC33', '#FFFF99', '#99CC66', '#009966']
 )
 
+# Longest edge (in pixels) of rasters read for display
+MAX_DISPLAY_SIZE = 4096
+
+# Number of pixels sampled to estimate the colour scale range
+DISPLAY_RANGE_SAMPLES = 200_000
+
+# Number of grid points for kernel density estimates
+KDE_GRID_SIZE = 4096
+
+# Output settings for saved figures. PNG deflate level 1 is cheaper than the
+# default level 6 for slightly larger files; for intermediate runs set
+# PAPUA_MAP_DPI=150, and for publication figures PAPUA_PNG_COMPRESS=6.
+SAVE_DPI = int(os.environ.get('PAPUA_MAP_DPI', 300))
+COMPRESS_LEVEL = int(os.environ.get('PAPUA_PNG_COMPRESS', 1))
+
+# Tile zoom level for basemaps shared across map panels
+BASEMAP_ZOOM = 8
+
+# Maximum number of panel rasters loaded concurrently
+MAX_LOAD_WORKERS = 8
+
+# Number of display rasters kept in memory across map calls; each entry holds
+# up to MAX_DISPLAY_SIZE^2 float32 pixels plus a mask (about 80 MB)
+RASTER_CACHE_SIZE = int(os.environ.get('PAPUA_RASTER_CACHE', 4))
+
+def _save_figure(output_path, **kwargs):
+    """
+    Save the current figure with the module's DPI and PNG compression.
+    
+    Parameters:
+    -----------
+    output_path : str
+        Path to save the figure to
+    **kwargs
+        Additional keyword arguments for matplotlib.pyplot.savefig
+    """
+    kwargs.setdefault('dpi', SAVE_DPI)
+    # pil_kwargs is only accepted by the raster writers
+    if os.path.splitext(output_path)[1].lower() == '.png':
+        kwargs.setdefault('pil_kwargs', {'compress_level': COMPRESS_LEVEL})
+    plt.savefig(output_path, **kwargs)
+
+@lru_cache(maxsize=None)
+def _init_basemap_cache():
+    """
+    Point contextily at BASEMAP_CACHE_DIR, once, on the first basemap request.
+    """
+    os.makedirs(BASEMAP_CACHE_DIR, exist_ok=True)
+    ctx.set_cache_dir(BASEMAP_CACHE_DIR)
+
+def _fetch_basemap(bounds, crs, zoom=BASEMAP_ZOOM, source=None):
+    """
+    Fetch basemap tiles covering the given bounds, warped to the map CRS.
+    
+    Parameters:
+    -----------
+    bounds : tuple
+        (left, bottom, right, top) in the map CRS
+    crs : rasterio.crs.CRS
+        CRS of the map
+    zoom : int, optional
+        Tile zoom level
+    source : xyzservices.TileProvider, optional
+        Tile source, defaults to OpenStreetMap Mapnik
+    
+    Returns:
+    --------
+    tuple
+        (image, extent) with extent as (left, right, bottom, top)
+    """
+    _init_basemap_cache()
+    if source is None:
+        source = ctx.providers.OpenStreetMap.Mapnik
+    west, south, east, north = transform_bounds(crs, 'EPSG:3857', *bounds)
+    image, tile_extent = ctx.bounds2img(west, south, east, north, zoom=zoom, source=source)
+    
+    return ctx.warp_tiles(image, tile_extent, t_crs=crs)
+
+def _read_for_display(src, max_size=MAX_DISPLAY_SIZE):
+    """
+    Read the first band of a raster at no more than display resolution.
+    
+    Rasters larger than max_size are decimated on read, which lets GDAL
+    serve the pixels from overviews instead of the full-resolution band.
+    NoData and non-positive pixels are masked, so they are drawn
+    transparent and can be dropped with ``compressed()``.
+    
+    Parameters:
+    -----------
+    src : rasterio.DatasetReader
+        Open raster dataset
+    max_size : int, optional
+        Maximum number of pixels along the longest edge
+    
+    Returns:
+    --------
+    tuple
+        (data, extent) with data as a masked array and extent as
+        (left, right, bottom, top)
+    """
+    scale = max(1, int(np.ceil(max(src.height, src.width) / max_size)))
+    out_shape = (int(np.ceil(src.height / scale)), int(np.ceil(src.width / scale)))
+    data = src.read(1, out_shape=out_shape, resampling=Resampling.nearest,
+                    out_dtype=np.float32, masked=True)
+    
+    return np.ma.masked_less_equal(data, 0, copy=False), plotting_extent(src)
+
+@lru_cache(maxsize=RASTER_CACHE_SIZE)
+def _load_raster(raster_path, mtime, max_size=MAX_DISPLAY_SIZE):
+    """
+    Load a raster for display, caching the result across map calls.
+    
+    The modification time is part of the cache key, so a rewritten file is
+    read again. The cached array is shared and therefore read-only.
+    
+    Parameters:
+    -----------
+    raster_path : str
+        Path to the raster file
+    mtime : float
+        Modification time of the raster file
+    max_size : int, optional
+        Maximum number of pixels along the longest edge
+    
+    Returns:
+    --------
+    tuple
+        (data, extent) with data as a masked array and extent as
+        (left, right, bottom, top)
+    """
+    with rasterio.open(raster_path) as src:
+        data, extent = _read_for_display(src, max_size)
+    values, invalid = np.ma.getdata(data), np.ma.getmaskarray(data)
+    values.setflags(write=False)
+    invalid.setflags(write=False)
+    
+    return np.ma.masked_array(values, mask=invalid, copy=False), extent
+
+def _load_panel(raster_path):
+    """
+    Load a raster for a map panel together with its colour scale range.
+    
+    Parameters:
+    -----------
+    raster_path : str
+        Path to the raster file
+    
+    Returns:
+    --------
+    tuple
+        (data, extent, (vmin, vmax))
+    """
+    data, extent = _load_raster(raster_path, os.path.getmtime(raster_path))
+    
+    # 1st and 99th percentiles to avoid outliers
+    return data, extent, _display_range(data.compressed())
+
+def _display_range(valid_data, lo=1, hi=99, n_samples=DISPLAY_RANGE_SAMPLES):
+    """
+    Estimate the colour scale range of a raster from a sample of its pixels.
+    
+    The range only drives display clipping, so percentiles of a seeded
+    random sample are used instead of partitioning every valid pixel.
+    
+    Parameters:
+    -----------
+    valid_data : numpy.ndarray
+        Valid (non-NoData) pixel values; may be reordered in place
+    lo : float, optional
+        Lower percentile
+    hi : float, optional
+        Upper percentile
+    n_samples : int, optional
+        Maximum number of pixels to sample
+    
+    Returns:
+    --------
+    tuple
+        (vmin, vmax)
+    """
+    if valid_data.size > n_samples:
+        valid_data = np.random.default_rng(0).choice(valid_data, n_samples, replace=False)
+    vmin, vmax = np.percentile(valid_data, [lo, hi], overwrite_input=True)
+    
+    return vmin, vmax
+
+def _fft_kde(data, grid_size=KDE_GRID_SIZE, cut=3):
+    """
+    Gaussian kernel density estimate computed by binning and FFT convolution.
+    
+    Uses Scott's rule for the bandwidth and extends the grid by cut
+    bandwidths past the data range, as seaborn's kdeplot does, but costs
+    O(n + m log m) instead of evaluating every sample at every grid point.
+    
+    Parameters:
+    -----------
+    data : numpy.ndarray
+        Sample values
+    grid_size : int, optional
+        Number of grid points
+    cut : float, optional
+        Number of bandwidths to extend the grid past the data range
+    
+    Returns:
+    --------
+    tuple
+        (x, density) arrays of length grid_size
+    """
+    data = np.asarray(data, dtype=np.float64).ravel()
+    bandwidth = data.std(ddof=1) * data.size ** (-1 / 5)
+    lo = data.min() - cut * bandwidth
+    hi = data.max() + cut * bandwidth
+    
+    counts, edges = np.histogram(data, bins=grid_size, range=(lo, hi))
+    x = (edges[:-1] + edges[1:]) / 2
+    dx = edges[1] - edges[0]
+    
+    # Convolve with the Gaussian kernel in the frequency domain, zero-padded
+    # to twice the grid so the convolution does not wrap around
+    n_fft = 2 * grid_size
+    freqs = np.fft.rfftfreq(n_fft, d=dx)
+    kernel = np.exp(-0.5 * (2 * np.pi * freqs * bandwidth) ** 2)
+    density = np.fft.irfft(np.fft.rfft(counts, n_fft) * kernel, n_fft)[:grid_size]
+    density = np.clip(density, 0, None) / (data.size * dx)
+    
+    return x, density
+
 def create_carbon_map(carbon_raster_path, output_path, admin_boundary=None, 
                       mining_areas=None, title="Carbon Storage (Mg/ha)", 
                       cmap=CARBON_CMAP, add_basemap=False):
@@ -73,16 +307,14 @@ def create_carbon_map(carbon_raster_path, output_path, admin_boundary=None,
     fig, ax = plt.subplots(figsize=(12, 10))
     
     # Load and display the carbon raster
-    with rasterio.open(carbon_raster_path) as src:
-        carbon_data = src.read(1)
-        
-        # Calculate min and max for color scaling, excluding NoData values
-        valid_data = carbon_data[carbon_data > 0]
-        vmin = np.percentile(valid_data, 1)  # 1st percentile to avoid outliers
-        vmax = np.percentile(valid_data, 99)  # 99th percentile to avoid outliers
-        
-        # Display the raster
-        im = show(src, ax=ax, cmap=cmap, vmin=vmin, vmax=vmax, title="")
+    carbon_data, extent = _load_raster(carbon_raster_path, os.path.getmtime(carbon_raster_path))
+    
+    # Calculate min and max for color scaling, excluding NoData values
+    # 1st and 99th percentiles to avoid outliers
+    vmin, vmax = _display_range(carbon_data.compressed())
+    
+    # Display the raster
+    im = ax.imshow(carbon_data, extent=extent, cmap=cmap, vmin=vmin, vmax=vmax)
     
     # Add administrative boundary if provided
     if admin_boundary is not None:
@@ -93,14 +325,17 @@ def create_carbon_map(carbon_raster_path, output_path, admin_boundary=None,
         mining_areas.boundary.plot(ax=ax, color='red', linewidth=1)
         # Add centroids with labels
         if 'name' in mining_areas.columns:
-            for idx, row in mining_areas.iterrows():
-                ax.annotate(row['name'], xy=(row.geometry.centroid.x, row.geometry.centroid.y),
+            centroids = mining_areas.geometry.centroid
+            for name, x, y in zip(mining_areas['name'].to_numpy(),
+                                  centroids.x.to_numpy(), centroids.y.to_numpy()):
+                ax.annotate(name, xy=(x, y),
                            xytext=(3, 3), textcoords="offset points", 
                            fontsize=8, color='red', weight='bold')
     
     # Add basemap if requested
     if add_basemap:
         try:
+            _init_basemap_cache()
             ctx.add_basemap(ax, crs=admin_boundary.crs.to_string() if admin_boundary is not None else None,
                           source=ctx.providers.OpenStreetMap.Mapnik)
         except Exception as e:
@@ -131,7 +366,7 @@ def create_carbon_map(carbon_raster_path, output_path, admin_boundary=None,
     
     # Improve layout and save
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    _save_figure(output_path, bbox_inches='tight')
     
     return fig
 
@@ -164,42 +399,31 @@ def create_comparison_map(baseline_raster, scenario_raster, output_path,
     # Create figure and axis
     fig, ax = plt.subplots(figsize=(12, 10))
     
-    # Load the rasters
-    with rasterio.open(baseline_raster) as baseline_src:
-        baseline_data = baseline_src.read(1)
-        meta = baseline_src.meta
-        
-    with rasterio.open(scenario_raster) as scenario_src:
-        scenario_data = scenario_src.read(1)
+    with rasterio.open(baseline_raster) as baseline_src, rasterio.open(scenario_raster) as scenario_src:
+        if baseline_src.shape != scenario_src.shape:
+            raise ValueError(f"Raster shapes differ: {baseline_src.shape} vs {scenario_src.shape}")
+    
+    # Load both rasters at display resolution, concurrently; the difference
+    # is only ever needed at the resolution it is drawn at
+    paths = [baseline_raster, scenario_raster]
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        (baseline_data, extent), (scenario_data, _) = executor.map(
+            lambda p: _load_raster(p, os.path.getmtime(p)), paths)
     
-    # Calculate difference
+    # Calculate difference; pixels that are NoData in either raster stay masked
     diff_data = scenario_data - baseline_data
     
     # Calculate min and max for color scaling, excluding NoData values
-    valid_data = diff_data[np.logical_and(baseline_data > 0, scenario_data > 0)]
-    vmin = np.percentile(valid_data, 1)  # 1st percentile to avoid outliers
-    vmax = np.percentile(valid_data, 99)  # 99th percentile to avoid outliers
+    # 1st and 99th percentiles to avoid outliers
+    vmin, vmax = _display_range(diff_data.compressed())
     
     # Ensure symmetric color scale for better visualization of changes
     abs_max = max(abs(vmin), abs(vmax))
     vmin = -abs_max
     vmax = abs_max
     
-    # Create a temporary file for the difference raster
-    import tempfile
-    with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as tmp:
-        tmp_path = tmp.name
-    
-    # Write the difference raster to a temporary file
-    with rasterio.open(tmp_path, 'w', **meta) as dst:
-        dst.write(diff_data, 1)
-    
     # Display the difference raster
-    with rasterio.open(tmp_path) as src:
-        im = show(src, ax=ax, cmap=cmap, vmin=vmin, vmax=vmax, title="")
-    
-    # Remove temporary file
-    os.remove(tmp_path)
+    im = ax.imshow(diff_data, extent=extent, cmap=cmap, vmin=vmin, vmax=vmax)
     
     # Add administrative boundary if provided
     if admin_boundary is not None:
@@ -216,12 +440,13 @@ def create_comparison_map(baseline_raster, scenario_raster, output_path,
     
     # Improve layout and save
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    _save_figure(output_path, bbox_inches='tight')
     
     return fig
 
 def create_multi_panel_map(raster_paths, titles, output_path, admin_boundary=None,
-                           mining_areas=None, cmap=CARBON_CMAP, main_title=None):
+                           mining_areas=None, cmap=CARBON_CMAP, main_title=None,
+                           add_basemap=False):
     """
     Create a multi-panel map with multiple rasters.
     
@@ -241,6 +466,9 @@ def create_multi_panel_map(raster_paths, titles, output_path, admin_boundary=Non
         Colormap to use for the raster display
     main_title : str, optional
         Main title for the entire figure
+    add_basemap : bool, optional
+        Whether to add a basemap from contextily; the tiles are fetched once
+        and shared by all panels, which must use the same CRS
     
     Returns:
     --------
@@ -265,24 +493,30 @@ def create_multi_panel_map(raster_paths, titles, output_path, admin_boundary=Non
     else:
         axes = [axes]
     
+    # Load the rasters and their colour ranges concurrently; GDAL releases
+    # the GIL while reading, so the reads overlap
+    panel_paths = [raster_path for raster_path, _ in zip(raster_paths, titles)][:len(axes)]
+    with ThreadPoolExecutor(max_workers=min(MAX_LOAD_WORKERS, max(1, len(panel_paths)))) as executor:
+        panels = list(executor.map(_load_panel, panel_paths))
+    
+    # Fetch the basemap once for the combined extent of all panels
+    basemap = None
+    if add_basemap and panels:
+        try:
+            extents = [extent for _, extent, _ in panels]
+            bounds = (min(e[0] for e in extents), min(e[2] for e in extents),
+                      max(e[1] for e in extents), max(e[3] for e in extents))
+            with rasterio.open(raster_paths[0]) as src:
+                basemap = _fetch_basemap(bounds, src.crs)
+        except Exception as e:
+            print(f"Warning: Could not add basemap: {e}")
+    
     # Process each raster
-    for i, (raster_path, title) in enumerate(zip(raster_paths, titles)):
-        if i >= len(axes):
-            break
-            
+    for i, (title, (raster_data, extent, (vmin, vmax))) in enumerate(zip(titles, panels)):
         ax = axes[i]
         
-        # Load and display the raster
-        with rasterio.open(raster_path) as src:
-            raster_data = src.read(1)
-            
-            # Calculate min and max for color scaling, excluding NoData values
-            valid_data = raster_data[raster_data > 0]
-            vmin = np.percentile(valid_data, 1)  # 1st percentile to avoid outliers
-            vmax = np.percentile(valid_data, 99)  # 99th percentile to avoid outliers
-            
-            # Display the raster
-            im = show(src, ax=ax, cmap=cmap, vmin=vmin, vmax=vmax, title="")
+        # Display the raster, scaled to its valid (non-NoData) range
+        im = ax.imshow(raster_data, extent=extent, cmap=cmap, vmin=vmin, vmax=vmax)
         
         # Add administrative boundary if provided
         if admin_boundary is not None:
@@ -292,6 +526,14 @@ def create_multi_panel_map(raster_paths, titles, output_path, admin_boundary=Non
         if mining_areas is not None:
             mining_areas.boundary.plot(ax=ax, color='red', linewidth=0.5)
         
+        # Add the shared basemap beneath the raster, keeping the panel extent
+        if basemap is not None:
+            xlim, ylim = ax.get_xlim(), ax.get_ylim()
+            basemap_image, basemap_extent = basemap
+            ax.imshow(basemap_image, extent=basemap_extent, zorder=-1)
+            ax.set_xlim(xlim)
+            ax.set_ylim(ylim)
+        
         # Add title
         ax.set_title(title, fontsize=12)
         
@@ -315,7 +557,7 @@ def create_multi_panel_map(raster_paths, titles, output_path, admin_boundary=Non
     
     # Improve layout and save
     plt.tight_layout(rect=[0, 0.07, 1, 0.95])  # Make room for the colorbar and main title
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    _save_figure(output_path, bbox_inches='tight')
     
     return fig
 
@@ -346,7 +588,14 @@ def create_carbon_distribution_chart(carbon_data_dict, output_path,
     
     # Plot distribution for each area
     for (area_name, carbon_data), color in zip(carbon_data_dict.items(), palette):
-        sns.kdeplot(carbon_data, label=area_name, color=color, fill=True, alpha=0.3, ax=ax)
+        carbon_data = np.asarray(carbon_data, dtype=np.float64).ravel()
+        carbon_data = carbon_data[np.isfinite(carbon_data)]
+        if carbon_data.size < 2 or carbon_data.std() == 0:
+            print(f"Warning: Skipping density for {area_name}: fewer than two distinct values")
+            continue
+        x, density = _fft_kde(carbon_data)
+        ax.fill_between(x, density, color=color, alpha=0.3, label=area_name)
+        ax.plot(x, density, color=color)
     
     # Add labels and title
     ax.set_xlabel('Carbon Storage (Mg/ha)')
@@ -360,7 +609,7 @@ def create_carbon_distribution_chart(carbon_data_dict, output_path,
     stats_text = ""
     for area_name, carbon_data in carbon_data_dict.items():
         stats_text += f"{area_name}:\n"
-        stats_text += f"  Mean: {np.mean(carbon_data):.1f} Mg/ha\n"
+        stats_text += f"  Mean: {np.mean(carbon_data, dtype=np.float64):.1f} Mg/ha\n"
         stats_text += f"  Median: {np.median(carbon_data):.1f} Mg/ha\n"
         stats_text += f"  Range: {np.min(carbon_data):.1f} - {np.max(carbon_data):.1f} Mg/ha\n\n"
     
@@ -369,7 +618,7 @@ def create_carbon_distribution_chart(carbon_data_dict, output_path,
     
     # Improve layout and save
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300)
+    _save_figure(output_path)
     
     return fig
 
@@ -396,8 +645,8 @@ def create_carbon_value_chart(value_data, output_path,
     fig, ax = plt.subplots(figsize=(12, 6))
     
     # Create the bar chart
-    sns.barplot(x='land_use', y='value_per_ha', data=value_data, 
-               palette='YlGn', ax=ax)
+    colors = sns.color_palette('YlGn', len(value_data))
+    ax.bar(value_data['land_use'], value_data['value_per_ha'], color=colors)
     
     # Add labels and title
     ax.set_xlabel('Land Use Type')
@@ -413,7 +662,7 @@ def create_carbon_value_chart(value_data, output_path,
     
     # Improve layout and save
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300)
+    _save_figure(output_path)
     
     return fig
 
@@ -459,7 +708,7 @@ def create_scenario_comparison_chart(scenario_data, output_path,
     
     # Improve layout and save
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300)
+    _save_figure(output_path)
     
     return fig
 